@@ -1,7 +1,30 @@
 from django.contrib import admin
-from .models import Itinerary, Day
+from .models import ApiCacheEntry, Destination, DestinationAlias, Itinerary, Day, PlanningJob
 
 # Register your models here.
 admin.site.register(Itinerary)
 admin.site.register(Day)
 
+
+@admin.register(PlanningJob)
+class PlanningJobAdmin(admin.ModelAdmin):
+    list_display = ('id', 'itinerary', 'status', 'stage', 'progress', 'attempts', 'worker', 'created_at')
+    list_filter = ('status',)
+
+
+@admin.register(ApiCacheEntry)
+class ApiCacheEntryAdmin(admin.ModelAdmin):
+    list_display = ('namespace', 'key', 'hits', 'last_used_at', 'expires_at')
+    list_filter = ('namespace',)
+
+
+class DestinationAliasInline(admin.TabularInline):
+    model = DestinationAlias
+    extra = 0
+
+
+@admin.register(Destination)
+class DestinationAdmin(admin.ModelAdmin):
+    list_display = ('name', 'lat', 'lng', 'created_at')
+    search_fields = ('name', 'aliases__alias')
+    inlines = [DestinationAliasInline]
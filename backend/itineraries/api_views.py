@@ -3,13 +3,11 @@
 from rest_framework import generics, permissions, status 
 from rest_framework.response import Response # type: ignore
 from rest_framework.views import APIView # type: ignore
-from .models import Itinerary, Day
-from .serializers import ItinerarySerializer
-from .services import (
-    get_cordinates_google_geocoding, generate_itinerary_overview,
-    plan_one_day_itinerary, replace_single_place_in_day
-)
-from datetime import timedelta
+from django.urls import reverse
+from .jobs import enqueue_itinerary
+from .models import Itinerary, Day, PlanningJob
+from .serializers import ItinerarySerializer, PlanningJobSerializer
+from .services import parse_place_index, replace_single_place_in_day
 from rest_framework.authentication import TokenAuthentication
 import logging
 
@@ -30,37 +28,23 @@ class ItineraryListCreateView(generics.ListCreateAPIView):
             logger.error(f"Error fetching itineraries: {str(e)}")
             return Itinerary.objects.none()
 
+    def create(self, request, *args, **kwargs):
+        # O planejamento roda no worker: responde 202 com o job para o cliente acompanhar
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        job = self.perform_create(serializer)
+
+        data = dict(serializer.data)
+        data['job'] = PlanningJobSerializer(job).data
+        job_url = reverse('api_planning_job', args=[job.id])
+        return Response(data, status=status.HTTP_202_ACCEPTED, headers={'Location': job_url})
+
     def perform_create(self, serializer):
         try:
             itinerary = serializer.save(user=self.request.user)
             itinerary.interests = self.request.data.get('interests', '')
             itinerary.save()
-
-            lat, lng = get_cordinates_google_geocoding(itinerary.destination)
-            itinerary.lat = lat
-            itinerary.lng = lng
-
-            overview = generate_itinerary_overview(itinerary)
-            itinerary.generated_text = overview
-            itinerary.save()
-
-            current_date = itinerary.start_date
-            day_number = 1
-            visited_places_list = []
-
-            while current_date <= itinerary.end_date:
-                day = Day.objects.create(
-                    itinerary=itinerary,
-                    day_number=day_number,
-                    date=current_date
-                )
-                day_text, final_places = plan_one_day_itinerary(itinerary, day, visited_places_list)
-                day.generated_text = day_text
-                day.save()
-
-                visited_places_list.extend(final_places)
-                current_date += timedelta(days=1)
-                day_number += 1
+            return enqueue_itinerary(itinerary)
         except Exception as e:
             logger.error(f"Error creating itinerary: {str(e)}")
             raise
@@ -76,18 +60,32 @@ class ItineraryDetailView(generics.RetrieveDestroyAPIView):
         return Itinerary.objects.filter(user=self.request.user).prefetch_related('days')
 
 
+class PlanningJobDetailView(generics.RetrieveAPIView):
+    """
+    Status/progresso da geração de um itinerário (o cliente faz polling aqui).
+    """
+    permission_classes = [permissions.IsAuthenticated]
+    serializer_class = PlanningJobSerializer
+    authentication_classes = [TokenAuthentication]
+
+    def get_queryset(self):
+        return PlanningJob.objects.filter(itinerary__user=self.request.user)
+
+
 class ReplacePlaceAPIView(APIView):
     permission_classes = [permissions.IsAuthenticated]
 
     def post(self, request, *args, **kwargs):
         day_id = request.data.get('day_id')
-        place_index = request.data.get('place_index')
+        place_index = parse_place_index(request.data.get('place_index'))
         observation = request.data.get('observation', '')
 
         try:
             day = Day.objects.get(id=day_id, itinerary__user=request.user)
         except Day.DoesNotExist:
             return Response({'error': 'Invalid day ID'}, status=404)
+        if place_index is None:
+            return Response({'error': 'Invalid place_index'}, status=400)
 
         replace_single_place_in_day(day, place_index, observation)
         return Response({'success': True})
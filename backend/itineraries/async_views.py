@@ -0,0 +1,233 @@
+# itineraries/async_views.py
+
+"""
+Endpoints assíncronos da API (ASGI).
+
+Criar um itinerário e trocar um lugar aguardam o núcleo assíncrono de
+services.py sem prender uma thread, então um único worker ASGI segura
+centenas de planejamentos esperando Google / OpenAI. O create planeja dentro
+do próprio request (sem worker da fila) e responde 201 com o itinerário
+pronto; o PlanningJob é registrado igual, então o polling de status também
+funciona. O stream faz o mesmo, mas devolve cada resultado (overview e
+cada Day) assim que fica pronto, como Server-Sent Events ou NDJSON.
+
+Autenticação: o mesmo header "Authorization: Token <key>" da API DRF.
+"""
+
+import asyncio
+import json
+import logging
+
+from asgiref.sync import sync_to_async
+from django.core.serializers.json import DjangoJSONEncoder
+from django.http import JsonResponse, StreamingHttpResponse
+from django.utils import timezone
+from django.views.decorators.csrf import csrf_exempt
+from django.views.decorators.http import require_POST
+from rest_framework.authtoken.models import Token
+
+from .jobs import arun_job
+from .models import Day, Itinerary, PlanningJob
+from .serializers import DaySerializer, ItinerarySerializer, PlanningJobSerializer
+from .services import areplace_single_place_in_day, parse_place_index
+
+logger = logging.getLogger(__name__)
+
+STREAM_CONTENT_TYPES = {
+    'sse': 'text/event-stream',
+    'ndjson': 'application/x-ndjson',
+}
+
+# o asyncio só guarda referência fraca das tasks; estas não podem sumir no meio
+_background_tasks = set()
+
+
+async def _token_user(request):
+    """
+    User of a "Token <key>" Authorization header, or None.
+    """
+    parts = request.headers.get('Authorization', '').split()
+    if len(parts) != 2 or parts[0].lower() != 'token':
+        return None
+    try:
+        token = await Token.objects.select_related('user').aget(key=parts[1])
+    except Token.DoesNotExist:
+        return None
+    return token.user if token.user.is_active else None
+
+
+def _json_body(request):
+    try:
+        data = json.loads(request.body or b'{}')
+    except ValueError:
+        return None
+    return data if isinstance(data, dict) else None
+
+
+def _unauthorized():
+    return JsonResponse({'detail': 'Authentication credentials were not provided.'}, status=401)
+
+
+def _save_itinerary(data, user):
+    serializer = ItinerarySerializer(data=data)
+    if not serializer.is_valid():
+        return None, serializer.errors
+    itinerary = serializer.save(user=user)
+    itinerary.interests = data.get('interests', '')
+    itinerary.save()
+    return itinerary, None
+
+
+def _itinerary_data(pk):
+    itinerary = Itinerary.objects.prefetch_related('days').get(pk=pk)
+    return dict(ItinerarySerializer(itinerary).data)
+
+
+async def _start_planning(request):
+    """
+    Authenticate, validate and save the itinerary, and open a running
+    PlanningJob for it. Returns (itinerary, job, None) or (None, None, error response).
+    """
+    user = await _token_user(request)
+    if user is None:
+        return None, None, _unauthorized()
+    data = _json_body(request)
+    if data is None:
+        return None, None, JsonResponse({'error': 'Invalid JSON body'}, status=400)
+
+    itinerary, errors = await sync_to_async(_save_itinerary)(data, user)
+    if errors:
+        return None, None, JsonResponse(errors, status=400)
+
+    now = timezone.now()
+    job = await PlanningJob.objects.acreate(
+        itinerary=itinerary,
+        status=PlanningJob.STATUS_RUNNING,
+        stage='queued',
+        worker='asgi',
+        attempts=1,
+        started_at=now,
+        heartbeat_at=now,
+    )
+    return itinerary, job, None
+
+
+@csrf_exempt
+@require_POST
+async def itinerary_create_view(request):
+    itinerary, job, error = await _start_planning(request)
+    if error:
+        return error
+
+    job = await arun_job(job)
+    job_data = PlanningJobSerializer(job).data
+    if job.status == PlanningJob.STATUS_FAILED:
+        return JsonResponse({'error': job.error, 'job': job_data}, status=502)
+
+    response = await sync_to_async(_itinerary_data)(itinerary.pk)
+    response['job'] = job_data
+    return JsonResponse(response, status=201)
+
+
+def _stream_format(request):
+    fmt = request.GET.get('format')
+    if fmt in STREAM_CONTENT_TYPES:
+        return fmt
+    if 'application/x-ndjson' in request.headers.get('Accept', ''):
+        return 'ndjson'
+    return 'sse'
+
+
+def _encode_event(fmt, event, data):
+    if fmt == 'sse':
+        payload = json.dumps(data, cls=DjangoJSONEncoder, ensure_ascii=False)
+        return f"event: {event}\ndata: {payload}\n\n"
+    return json.dumps({'event': event, 'data': data}, cls=DjangoJSONEncoder, ensure_ascii=False) + "\n"
+
+
+@csrf_exempt
+@require_POST
+async def itinerary_stream_view(request):
+    """
+    Plan a trip and stream the results as they are ready:
+
+        itinerary      the saved itinerary (id, dates, ...) and its job
+        overview_text  {delta}: overview tokens as the model writes them
+        overview       generated_text, lat, lng (written while the days are planned)
+        day_text       {id, day_number, delta}: narrative tokens of a day
+                       (before the addresses are added)
+        day            one per Day, in completion order (DaySerializer)
+        done           the finished job (or `error` if planning failed)
+
+    SSE by default; NDJSON with ?format=ndjson or Accept: application/x-ndjson.
+    """
+    itinerary, job, error = await _start_planning(request)
+    if error:
+        return error
+
+    fmt = _stream_format(request)
+    queue = asyncio.Queue()
+
+    async def on_ready(kind, obj):
+        if kind == 'overview':
+            data = {'id': obj.id, 'generated_text': obj.generated_text,
+                    'lat': obj.lat, 'lng': obj.lng}
+        elif kind == 'overview_text':
+            data = {'delta': obj}
+        elif kind == 'day_text':
+            day, delta = obj
+            data = {'id': day.id, 'day_number': day.day_number, 'delta': delta}
+        else:
+            data = DaySerializer(obj).data
+        await queue.put((kind, data))
+
+    async def plan():
+        try:
+            finished = await arun_job(job, on_ready=on_ready)
+            event = 'error' if finished.status == PlanningJob.STATUS_FAILED else 'done'
+            await queue.put((event, PlanningJobSerializer(finished).data))
+        finally:
+            await queue.put(None)
+
+    first = await sync_to_async(_itinerary_data)(itinerary.pk)
+    first['job'] = PlanningJobSerializer(job).data
+
+    # o planejamento começa já, não no primeiro chunk da resposta: continua
+    # mesmo se o cliente desconectar antes de ler qualquer coisa, e o
+    # itinerário fica completo para ser buscado depois
+    task = asyncio.ensure_future(plan())
+    _background_tasks.add(task)
+    task.add_done_callback(_background_tasks.discard)
+
+    async def events():
+        yield _encode_event(fmt, 'itinerary', first)
+        while (item := await queue.get()) is not None:
+            yield _encode_event(fmt, *item)
+
+    response = StreamingHttpResponse(events(), content_type=STREAM_CONTENT_TYPES[fmt])
+    response['Cache-Control'] = 'no-cache'
+    response['X-Accel-Buffering'] = 'no'      # nginx não deve segurar o stream
+    return response
+
+
+@csrf_exempt
+@require_POST
+async def replace_place_view(request):
+    user = await _token_user(request)
+    if user is None:
+        return _unauthorized()
+    data = _json_body(request)
+    if data is None:
+        return JsonResponse({'error': 'Invalid JSON body'}, status=400)
+
+    try:
+        day = await Day.objects.aget(id=data.get('day_id'), itinerary__user=user)
+    except (Day.DoesNotExist, ValueError):
+        return JsonResponse({'error': 'Invalid day ID'}, status=404)
+
+    place_index = parse_place_index(data.get('place_index'))
+    if place_index is None:
+        return JsonResponse({'error': 'Invalid place_index'}, status=400)
+
+    await areplace_single_place_in_day(day, place_index, data.get('observation', ''))
+    return JsonResponse({'success': True})
@@ -0,0 +1,193 @@
+# cache.py
+
+"""
+Cache persistente (tabela ApiCacheEntry) para respostas de APIs externas.
+
+Cada ResponseCache tem um namespace, um TTL e um limite de entradas; ao
+passar do limite, as entradas usadas há mais tempo são removidas (LRU).
+Falhas de banco nunca quebram o planejamento: viram um miss.
+"""
+
+import asyncio
+import hashlib
+import json
+import logging
+import threading
+import unicodedata
+from datetime import timedelta
+
+from asgiref.sync import sync_to_async
+from django.db import DatabaseError, IntegrityError
+from django.db.models import F
+from django.utils import timezone
+
+from .models import ApiCacheEntry
+
+logger = logging.getLogger(__name__)
+
+EVICT_EVERY = 50        # verifica o limite de tamanho a cada N gravações
+
+_registry = {}
+
+
+def normalize_text(value):
+    """
+    Lowercase, strip accents and collapse whitespace ("  São  Paulo " → "sao paulo").
+    """
+    value = unicodedata.normalize("NFKD", str(value or ""))
+    value = "".join(c for c in value if not unicodedata.combining(c))
+    return " ".join(value.lower().split())
+
+
+class ResponseCache:
+
+    def __init__(self, namespace, ttl, max_entries):
+        self.namespace = namespace
+        self.ttl = ttl                      # segundos; 0 desliga o cache
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._key_locks = {}
+        self._counters = {"hits": 0, "misses": 0, "writes": 0, "evictions": 0}
+        _registry[namespace] = self
+
+    @property
+    def enabled(self):
+        return self.ttl > 0
+
+    def key(self, *parts):
+        raw = json.dumps(parts, sort_keys=True, ensure_ascii=False, default=str)
+        return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+    def _count(self, name, amount=1):
+        with self._lock:
+            self._counters[name] += amount
+
+    def _lookup(self, key):
+        if not self.enabled:
+            return None
+        now = timezone.now()
+        try:
+            entry = (
+                ApiCacheEntry.objects
+                .filter(namespace=self.namespace, key=key, expires_at__gt=now)
+                .only("id", "payload")
+                .first()
+            )
+            if entry is None:
+                return None
+            ApiCacheEntry.objects.filter(pk=entry.pk).update(
+                hits=F("hits") + 1, last_used_at=now
+            )
+        except DatabaseError as e:
+            logger.warning(f"[ResponseCache:{self.namespace}] get falhou: {e}")
+            return None
+        return entry.payload
+
+    def get(self, key):
+        """
+        Return the cached payload or None on miss/expiry.
+        """
+        value = self._lookup(key)
+        self._count("misses" if value is None else "hits")
+        return value
+
+    def set(self, key, payload, ttl=None):
+        if not self.enabled:
+            return
+        now = timezone.now()
+        expires_at = now + timedelta(seconds=ttl or self.ttl)
+        try:
+            updated = ApiCacheEntry.objects.filter(namespace=self.namespace, key=key).update(
+                payload=payload, expires_at=expires_at, last_used_at=now
+            )
+            if not updated:
+                ApiCacheEntry.objects.create(
+                    namespace=self.namespace, key=key, payload=payload,
+                    expires_at=expires_at, last_used_at=now,
+                )
+        except IntegrityError:
+            # outra thread gravou a mesma chave ao mesmo tempo
+            pass
+        except DatabaseError as e:
+            logger.warning(f"[ResponseCache:{self.namespace}] set falhou: {e}")
+            return
+
+        self._count("writes")
+        if self._counters["writes"] % EVICT_EVERY == 0:
+            self.evict()
+
+    async def aget_or_set(self, key, fetch, cacheable=None):
+        """
+        Return the cached payload, or await `fetch()` and store its result.
+        Concurrent misses for the same key on the same event loop wait for a
+        single fetch instead of all hitting the upstream. `cacheable(value)`
+        can veto storing a result (e.g. error responses).
+        """
+        value = await sync_to_async(self._lookup)(key)
+        if value is not None:
+            self._count("hits")
+            return value
+
+        # asyncio.Lock pertence a um loop: a chave inclui o loop atual.
+        # [lock, usuários]: o lock só sai do dicionário quando o último
+        # interessado termina, senão quem chega depois criaria outro lock
+        # e buscaria em paralelo justamente quando o fetch falha
+        lock_key = (asyncio.get_running_loop(), key)
+        with self._lock:
+            entry = self._key_locks.setdefault(lock_key, [asyncio.Lock(), 0])
+            entry[1] += 1
+        key_lock = entry[0]
+        try:
+            async with key_lock:
+                # outra task pode ter buscado enquanto esperávamos
+                value = await sync_to_async(self._lookup)(key)
+                if value is not None:
+                    self._count("hits")
+                else:
+                    self._count("misses")
+                    value = await fetch()
+                    if value is not None and (cacheable is None or cacheable(value)):
+                        await sync_to_async(self.set)(key, value)
+        finally:
+            with self._lock:
+                entry[1] -= 1
+                if not entry[1]:
+                    self._key_locks.pop(lock_key, None)
+        return value
+
+    def evict(self):
+        """
+        Drop expired entries, then the least recently used ones above max_entries.
+        """
+        entries = ApiCacheEntry.objects.filter(namespace=self.namespace)
+        try:
+            removed, _ = entries.filter(expires_at__lte=timezone.now()).delete()
+            overflow = entries.count() - self.max_entries
+            if overflow > 0:
+                oldest = list(
+                    entries.order_by("last_used_at").values_list("id", flat=True)[:overflow]
+                )
+                removed += ApiCacheEntry.objects.filter(id__in=oldest).delete()[0]
+        except DatabaseError as e:
+            logger.warning(f"[ResponseCache:{self.namespace}] evict falhou: {e}")
+            return 0
+        if removed:
+            self._count("evictions", removed)
+        return removed
+
+    def clear(self):
+        ApiCacheEntry.objects.filter(namespace=self.namespace).delete()
+
+    def stats(self):
+        with self._lock:
+            counters = dict(self._counters)
+        lookups = counters["hits"] + counters["misses"]
+        counters["hit_rate"] = round(counters["hits"] / lookups, 3) if lookups else None
+        return counters
+
+
+def cache_stats():
+    """
+    Counters of every cache created in this process, keyed by namespace.
+    """
+    return {name: cache.stats() for name, cache in _registry.items()}
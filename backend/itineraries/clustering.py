@@ -0,0 +1,80 @@
+# clustering.py
+
+"""
+Áreas da viagem: um bairro por dia.
+
+Um pool de candidatos da cidade inteira (buscado uma vez por viagem) é
+agrupado com k-means (k = número de dias) sobre lat/lng projetados em km;
+cada grupo vira o centro e o raio das buscas de um dia. Assim os lugares de
+um mesmo dia ficam perto uns dos outros, e as buscas com raio pequeno voltam
+mais rápidas e mais relevantes.
+"""
+
+import numpy as np
+
+from .geo import haversine_km
+
+KMEANS_ITERATIONS = 50
+KM_PER_DEGREE = 111.32
+
+
+def _project(points):
+    """
+    Equirectangular projection (km) around the points' mean latitude.
+    """
+    pts = np.asarray(points, dtype=float).reshape(-1, 2)
+    scale = np.cos(np.radians(pts[:, 0].mean()))
+    return np.column_stack([pts[:, 0] * KM_PER_DEGREE, pts[:, 1] * KM_PER_DEGREE * scale]), scale
+
+
+def kmeans(points, k, seed=0):
+    """
+    Lloyd's k-means with k-means++ seeding over (lat, lng) points.
+    Returns (centers as (lat, lng) array of shape (k, 2), label of every point).
+    """
+    xy, scale = _project(points)
+    rng = np.random.default_rng(seed)
+
+    centers = [xy[rng.integers(len(xy))]]
+    for _ in range(1, k):
+        d2 = ((xy[:, None, :] - np.asarray(centers)[None, :, :]) ** 2).sum(-1).min(axis=1)
+        if not d2.sum():
+            centers.append(xy[rng.integers(len(xy))])
+        else:
+            centers.append(xy[rng.choice(len(xy), p=d2 / d2.sum())])
+    centers = np.asarray(centers)
+
+    labels = np.zeros(len(xy), dtype=int)
+    for _ in range(KMEANS_ITERATIONS):
+        labels = ((xy[:, None, :] - centers[None, :, :]) ** 2).sum(-1).argmin(axis=1)
+        moved = np.array([xy[labels == c].mean(axis=0) if np.any(labels == c) else centers[c]
+                          for c in range(k)])
+        if np.allclose(moved, centers):
+            break
+        centers = moved
+
+    latlng = np.column_stack([centers[:, 0] / KM_PER_DEGREE,
+                              centers[:, 1] / (KM_PER_DEGREE * scale)])
+    return latlng, labels
+
+
+def day_areas(points, days, min_km, max_km, seed=0):
+    """
+    One area per day: [(lat, lng, radius_km)], biggest cluster first.
+    The radius covers 90% of the cluster, clamped to [min_km, max_km].
+    Empty when there are too few points to split the city in `days` parts.
+    """
+    points = np.asarray(points, dtype=float).reshape(-1, 2)
+    if days < 2 or len(points) < 2 * days:
+        return []
+    centers, labels = kmeans(points, days, seed)
+
+    areas = []
+    for c in np.argsort(-np.bincount(labels, minlength=days), kind="stable"):
+        members = points[labels == c]
+        if not len(members):
+            continue
+        dist = haversine_km(centers[c, 0], centers[c, 1], members[:, 0], members[:, 1])
+        radius = float(np.clip(np.percentile(dist, 90), min_km, max_km))
+        areas.append((float(centers[c, 0]), float(centers[c, 1]), radius))
+    return areas
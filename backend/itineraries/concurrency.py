@@ -0,0 +1,92 @@
+# concurrency.py
+
+"""
+Helpers de concorrência do planejamento.
+
+O núcleo do planejamento é assíncrono: as chamadas ao Google / OpenAI de um
+mesmo itinerário rodam como tasks do asyncio (gather_limited), com um limite
+de chamadas simultâneas. As entradas síncronas (views WSGI, worker da fila)
+usam `run_sync` para delegar a esse núcleo; o worker da fila roda direto
+num event loop próprio (jobs.awork).
+"""
+
+import asyncio
+import functools
+import threading
+
+from asgiref.sync import async_to_sync
+
+from .http_client import async_session_scope
+
+
+class VisitedPlaces:
+    """
+    Conjunto thread-safe de nomes de lugares (lowercase) já usados na viagem.
+    `claim` testa e reserva o nome numa única operação, então dois dias
+    planejados em paralelo nunca ficam com o mesmo lugar.
+    """
+
+    def __init__(self, names=()):
+        self._names = {n.lower() for n in names}
+        self._lock = threading.Lock()
+
+    def claim(self, name):
+        key = name.lower()
+        with self._lock:
+            if key in self._names:
+                return False
+            self._names.add(key)
+            return True
+
+    def release(self, name):
+        with self._lock:
+            self._names.discard(name.lower())
+
+    def __contains__(self, name):
+        with self._lock:
+            return name.lower() in self._names
+
+    def __iter__(self):
+        with self._lock:
+            return iter(list(self._names))
+
+
+async def gather_limited(func, items, limit, on_result=None):
+    """
+    Await `func(item)` for every item with at most `limit` calls in flight and
+    return the results in input order. `on_result(index, result)` (a coroutine
+    function) is awaited as each call finishes. If one call fails, the others
+    are cancelled and the error propagates.
+    """
+    items = list(items)
+    semaphore = asyncio.Semaphore(max(1, limit))
+
+    async def run(index, item):
+        async with semaphore:
+            result = await func(item)
+        if on_result:
+            await on_result(index, result)
+        return result
+
+    # cada task herda uma cópia do contexto (prazo de resilience.deadline)
+    tasks = [asyncio.ensure_future(run(i, item)) for i, item in enumerate(items)]
+    try:
+        return await asyncio.gather(*tasks)
+    except BaseException:
+        for task in tasks:
+            task.cancel()
+        raise
+
+
+def run_sync(afunc):
+    """
+    Sync entry point for a coroutine function of the async core. The call
+    gets its own aiohttp session, closed when it returns.
+    """
+    @functools.wraps(afunc)
+    def wrapper(*args, **kwargs):
+        async def main():
+            async with async_session_scope():
+                return await afunc(*args, **kwargs)
+        return async_to_sync(main)()
+    return wrapper
@@ -0,0 +1,124 @@
+# gazetteer.py
+
+"""
+Índice destino → (lat, lng, nome canônico) consultado antes da Geocoding API.
+
+O texto digitado é normalizado (caixa, acentos, pontuação, espaços e apelidos
+comuns como "NYC" ou "Floripa") e guardado como DestinationAlias. Os acertos
+ficam também num dicionário em memória, então a segunda consulta do mesmo
+destino no processo nem vai ao banco.
+"""
+
+import logging
+import re
+import threading
+
+from django.db import DatabaseError, IntegrityError, transaction
+
+from .cache import normalize_text
+from .models import Destination, DestinationAlias
+
+logger = logging.getLogger(__name__)
+
+MEMO_MAX_ENTRIES = 2048
+
+DESTINATION_ALIASES = {
+    "nyc": "new york",
+    "ny": "new york",
+    "new york city": "new york",
+    "la": "los angeles",
+    "sf": "san francisco",
+    "ldn": "london",
+    "londres": "london",
+    "cdmx": "mexico city",
+    "ciudad de mexico": "mexico city",
+    "rio": "rio de janeiro",
+    "rj": "rio de janeiro",
+    "sp": "sao paulo",
+    "sampa": "sao paulo",
+    "bh": "belo horizonte",
+    "bsb": "brasilia",
+    "poa": "porto alegre",
+    "floripa": "florianopolis",
+}
+
+_PUNCTUATION_RE = re.compile(r"[^\w\s]")
+
+_memo = {}
+_memo_lock = threading.Lock()
+
+
+def normalize_destination(text):
+    """
+    "  Rio, Brasil " → "rio de janeiro brasil".
+    """
+    parts = [normalize_text(_PUNCTUATION_RE.sub(" ", p)) for p in str(text or "").split(",")]
+    parts = [p for p in parts if p]
+    if not parts:
+        return ""
+    parts[0] = DESTINATION_ALIASES.get(parts[0], parts[0])
+    return DESTINATION_ALIASES.get(" ".join(parts), " ".join(parts))
+
+
+def _remember(alias, value):
+    with _memo_lock:
+        if len(_memo) >= MEMO_MAX_ENTRIES:
+            _memo.clear()
+        _memo[alias] = value
+
+
+def lookup_destination(text):
+    """
+    Return (lat, lng, canonical_name) for a known destination, or None.
+    """
+    alias = normalize_destination(text)
+    if not alias:
+        return None
+    hit = _memo.get(alias)
+    if hit is not None:
+        return hit
+
+    try:
+        entry = (
+            DestinationAlias.objects
+            .select_related('destination')
+            .filter(alias=alias)
+            .first()
+        )
+    except DatabaseError as e:
+        logger.warning(f"[lookup_destination] Falha ao consultar gazetteer: {e}")
+        return None
+    if entry is None:
+        return None
+
+    dest = entry.destination
+    value = (float(dest.lat), float(dest.lng), dest.name)
+    _remember(alias, value)
+    return value
+
+
+def store_destination(text, lat, lng, canonical_name=None):
+    """
+    Record a geocoded destination under the normalized form of `text`.
+    Destinations with the same canonical name share one Destination row.
+    """
+    alias = normalize_destination(text)
+    if not alias or lat is None or lng is None:
+        return None
+    canonical_name = canonical_name or str(text).strip()
+
+    try:
+        with transaction.atomic():
+            dest = Destination.objects.filter(name=canonical_name).first()
+            if dest is None:
+                dest = Destination.objects.create(name=canonical_name, lat=round(float(lat), 6), lng=round(float(lng), 6))
+            DestinationAlias.objects.update_or_create(alias=alias, defaults={'destination': dest})
+            canonical_alias = normalize_destination(canonical_name)
+            if canonical_alias and canonical_alias != alias:
+                DestinationAlias.objects.get_or_create(alias=canonical_alias, defaults={'destination': dest})
+    except (IntegrityError, DatabaseError) as e:
+        logger.warning(f"[store_destination] Falha ao gravar '{text}': {e}")
+        return None
+
+    _remember(alias, (float(dest.lat), float(dest.lng), dest.name))
+    return dest
@@ -0,0 +1,100 @@
+# geo.py
+
+"""
+Filtro de distância em lote para os resultados do Places.
+
+geopy.geodesic resolve o elipsoide WGS-84 de forma iterativa, um ponto por
+vez. Para um raio de 25–50 km basta uma haversine vetorizada (NumPy) sobre
+todos os candidatos de uma vez: o erro dela em relação ao geodésico fica
+abaixo de ~0,5%. Só os candidatos nessa faixa em volta do raio são
+conferidos com geodesic, então o resultado é o mesmo do filtro antigo.
+"""
+
+import numpy as np
+from geopy.distance import geodesic
+
+EARTH_RADIUS_KM  = 6371.0088    # raio médio (IUGG)
+HAVERSINE_MARGIN = 0.005        # erro relativo máximo da esfera vs. WGS-84
+
+
+def haversine_km(lat, lng, lats, lngs):
+    """
+    Great-circle distance (km) from (lat, lng) to every point of the arrays.
+    """
+    lat1, lng1 = np.radians(lat), np.radians(lng)
+    lat2, lng2 = np.radians(lats), np.radians(lngs)
+    a = (np.sin((lat2 - lat1) / 2) ** 2
+         + np.cos(lat1) * np.cos(lat2) * np.sin((lng2 - lng1) / 2) ** 2)
+    return 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(np.clip(a, 0.0, 1.0)))
+
+
+def within_radius(lat, lng, points, max_km):
+    """
+    Boolean array: which (lat, lng) points lie within `max_km` of the origin.
+    Points with NaN coordinates are never inside. Haversine decides, except
+    for points within HAVERSINE_MARGIN of the boundary, which use geodesic.
+    """
+    if not len(points):
+        return np.zeros(0, dtype=bool)
+    coords = np.asarray(points, dtype=float).reshape(-1, 2)
+    dist = haversine_km(lat, lng, coords[:, 0], coords[:, 1])
+    inside = dist <= max_km
+    near = np.abs(dist - max_km) <= max_km * HAVERSINE_MARGIN
+    for i in np.flatnonzero(near):
+        inside[i] = geodesic((lat, lng), (coords[i, 0], coords[i, 1])).km <= max_km
+    return inside
+
+
+GEOHASH_ALPHABET = "0123456789bcdefghjkmnpqrstuvwxyz"
+GEOHASH_PRECISION = 9           # células de ~5 m, gravadas no índice de lugares
+KM_PER_DEGREE = 111.32
+
+
+def geohash_encode(lat, lng, precision=GEOHASH_PRECISION):
+    lat_range, lng_range = [-90.0, 90.0], [-180.0, 180.0]
+    chars, bits, value, even = [], 0, 0, True
+    while len(chars) < precision:
+        rng, coord = (lng_range, lng) if even else (lat_range, lat)
+        mid = (rng[0] + rng[1]) / 2
+        value <<= 1
+        if coord >= mid:
+            value |= 1
+            rng[0] = mid
+        else:
+            rng[1] = mid
+        even = not even
+        bits += 1
+        if bits == 5:
+            chars.append(GEOHASH_ALPHABET[value])
+            bits, value = 0, 0
+    return "".join(chars)
+
+
+def _geohash_cell_deg(precision):
+    """
+    (height, width) in degrees of a geohash cell.
+    """
+    lng_bits = (5 * precision + 1) // 2
+    lat_bits = 5 * precision // 2
+    return 180.0 / 2 ** lat_bits, 360.0 / 2 ** lng_bits
+
+
+def geohash_cover(lat, lng, radius_km):
+    """
+    Geohash prefixes whose cells cover the circle: the longest precision
+    whose cells are at least as tall as the radius, sampled over the
+    bounding box (so a handful of prefixes, never hundreds).
+    """
+    radius_deg = radius_km / KM_PER_DEGREE
+    precision = 1
+    while precision < GEOHASH_PRECISION and _geohash_cell_deg(precision + 1)[0] >= radius_deg:
+        precision += 1
+    height, width = _geohash_cell_deg(precision)
+
+    lng_radius = radius_deg / max(np.cos(np.radians(lat)), 0.01)
+    prefixes = set()
+    for y in np.arange(lat - radius_deg, lat + radius_deg + height / 2, height / 2):
+        for x in np.arange(lng - lng_radius, lng + lng_radius + width / 2, width / 2):
+            prefixes.add(geohash_encode(float(np.clip(y, -90, 90)),
+                                        float((x + 180) % 360 - 180), precision))
+    return sorted(prefixes)
@@ -0,0 +1,132 @@
+# http_client.py
+
+"""
+Sessão HTTP compartilhada pelo processo para todas as chamadas externas
+(Places, Geocoding, Weather, Static Maps, proxies).
+
+Um requests.Session mantém um pool de conexões keep-alive por host, então
+as chamadas seguintes ao mesmo host do Google reaproveitam a conexão TCP+TLS
+em vez de refazer o handshake a cada request.
+
+O núcleo assíncrono do planejamento usa um aiohttp.ClientSession por event
+loop (get_async_session). Sob ASGI é um só loop, então o pool é compartilhado
+por todos os requests; o worker da fila também roda num loop só, com uma
+sessão para todos os jobs. As demais entradas síncronas abrem uma sessão
+própria com `async_session_scope()` e a fecham ao terminar.
+"""
+
+import asyncio
+import contextvars
+import threading
+import weakref
+from contextlib import asynccontextmanager
+
+import aiohttp
+import requests
+from django.conf import settings
+from requests.adapters import HTTPAdapter
+
+_session = None
+_session_lock = threading.Lock()
+
+_async_sessions = weakref.WeakKeyDictionary()       # event loop → ClientSession
+_scoped_session = contextvars.ContextVar("scoped_async_session", default=None)
+
+
+class UpstreamHTTPError(Exception):
+    """
+    Non-2xx answer from an upstream called through `ahttp_get_json`.
+    """
+
+    def __init__(self, status, url):
+        super().__init__(f"HTTP {status} for {url}")
+        self.status = status
+        self.url = url
+
+
+def _build_session():
+    session = requests.Session()
+    adapter = HTTPAdapter(
+        pool_connections=settings.HTTP_POOL_CONNECTIONS,   # hosts distintos
+        pool_maxsize=settings.HTTP_POOL_MAXSIZE,           # conexões por host
+        pool_block=False,                                  # pool cheio → conexão avulsa
+        max_retries=0,                                     # retry fica com request_with_retry
+    )
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    return session
+
+
+def get_session():
+    """
+    Process-wide pooled session (created on first use).
+    """
+    global _session
+    if _session is None:
+        with _session_lock:
+            if _session is None:
+                _session = _build_session()
+    return _session
+
+
+def http_get(url, params=None, timeout=None, **kwargs):
+    """
+    GET through the pooled session, with the project default timeout.
+    """
+    timeout = timeout or settings.REQUEST_TIMEOUT
+    return get_session().get(url, params=params, timeout=timeout, **kwargs)
+
+
+def _build_async_session():
+    connector = aiohttp.TCPConnector(
+        limit=settings.HTTP_POOL_CONNECTIONS * settings.HTTP_POOL_MAXSIZE,
+        limit_per_host=settings.HTTP_POOL_MAXSIZE,
+    )
+    return aiohttp.ClientSession(connector=connector)
+
+
+async def get_async_session():
+    """
+    aiohttp session for the running event loop (or the one opened by
+    `async_session_scope`), created on first use.
+    """
+    session = _scoped_session.get()
+    if session is not None and not session.closed:
+        return session
+    loop = asyncio.get_running_loop()
+    session = _async_sessions.get(loop)
+    if session is None or session.closed:
+        session = _async_sessions[loop] = _build_async_session()
+    return session
+
+
+@asynccontextmanager
+async def async_session_scope():
+    """
+    Private session for a block, closed on exit. Used when an event loop only
+    lives for one call (async_to_sync), so no connection is left behind, and
+    around the whole worker loop (jobs.awork).
+    """
+    session = _build_async_session()
+    token = _scoped_session.set(session)
+    try:
+        yield session
+    finally:
+        _scoped_session.reset(token)
+        await session.close()
+
+
+async def ahttp_get_json(url, params=None, timeout=None):
+    """
+    Async GET through the pooled aiohttp session; returns the decoded JSON body.
+    Raises UpstreamHTTPError on non-2xx answers.
+    """
+    timeout = timeout or settings.REQUEST_TIMEOUT
+    # aiohttp só aceita str/int/float como parâmetro (Decimal do model, não)
+    params = {k: str(v) for k, v in (params or {}).items() if v is not None}
+    session = await get_async_session()
+    async with session.get(url, params=params,
+                           timeout=aiohttp.ClientTimeout(total=timeout)) as resp:
+        if resp.status >= 400:
+            raise UpstreamHTTPError(resp.status, url)
+        return await resp.json(content_type=None)
@@ -0,0 +1,256 @@
+# jobs.py
+
+"""
+Fila de geração de itinerários.
+
+As views só criam o Itinerary e chamam `enqueue_itinerary()`; o planejamento
+(geocoding, overview, um plan_one_day_itinerary por dia) roda num worker:
+
+    python manage.py run_planning_worker
+
+O broker é plugável via settings.PLANNING_JOB_BROKER. O padrão usa a própria
+tabela PlanningJob como fila, então funciona só com SQLite.
+"""
+
+import asyncio
+import logging
+import os
+import socket
+from datetime import timedelta
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db.models import F
+from django.utils import timezone
+from django.utils.module_loading import import_string
+
+from .concurrency import run_sync
+from .http_client import async_session_scope
+from .models import Itinerary, PlanningJob
+from .services import agenerate_itinerary
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_BROKER = 'itineraries.jobs.DatabaseBroker'
+
+# jobs executados dentro do próprio request (InlineBroker, views ASGI):
+# nenhum worker consegue retomá-los, então nunca voltam para a fila
+IN_REQUEST_WORKERS = ('inline', 'asgi')
+
+
+# ========================================================
+#                       Brokers
+# ========================================================
+
+class BaseBroker:
+    """
+    Interface mínima de um broker: `publish` avisa que há um job novo,
+    `claim` entrega o próximo job para um worker (ou None).
+    """
+
+    def publish(self, job):
+        raise NotImplementedError
+
+    def claim(self, worker_id):
+        raise NotImplementedError
+
+
+class DatabaseBroker(BaseBroker):
+    """
+    Usa a tabela PlanningJob como fila. O claim é um UPDATE condicional
+    (status=queued → running), então dois workers nunca pegam o mesmo job,
+    mesmo no SQLite, que não tem SELECT ... FOR UPDATE SKIP LOCKED.
+    """
+
+    def publish(self, job):
+        # a linha já está na tabela com status=queued
+        pass
+
+    def claim(self, worker_id):
+        candidates = (
+            PlanningJob.objects
+            .filter(status=PlanningJob.STATUS_QUEUED)
+            .order_by('created_at')
+            .values_list('id', flat=True)[:10]
+        )
+        for job_id in candidates:
+            now = timezone.now()
+            claimed = PlanningJob.objects.filter(
+                pk=job_id, status=PlanningJob.STATUS_QUEUED
+            ).update(
+                status=PlanningJob.STATUS_RUNNING,
+                worker=worker_id,
+                attempts=F('attempts') + 1,
+                started_at=now,
+                heartbeat_at=now,
+            )
+            if claimed:
+                return PlanningJob.objects.select_related('itinerary').get(pk=job_id)
+        return None
+
+
+class InlineBroker(BaseBroker):
+    """
+    Executa o job dentro do próprio request. Útil em desenvolvimento,
+    quando não há worker rodando.
+    """
+
+    def publish(self, job):
+        now = timezone.now()
+        PlanningJob.objects.filter(pk=job.pk).update(
+            status=PlanningJob.STATUS_RUNNING,
+            worker='inline',
+            attempts=F('attempts') + 1,
+            started_at=now,
+            heartbeat_at=now,
+        )
+        job.refresh_from_db()
+        run_job(job)
+
+    def claim(self, worker_id):
+        return None
+
+
+_broker = None
+
+
+def get_broker():
+    global _broker
+    if _broker is None:
+        path = getattr(settings, 'PLANNING_JOB_BROKER', DEFAULT_BROKER)
+        _broker = import_string(path)()
+    return _broker
+
+
+# ========================================================
+#                  Enqueue / Execution
+# ========================================================
+
+def enqueue_itinerary(itinerary):
+    """
+    Create a PlanningJob for an already saved itinerary and hand it to the broker.
+    """
+    job = PlanningJob.objects.create(itinerary=itinerary, stage='queued')
+    get_broker().publish(job)
+    logger.info(f"[enqueue_itinerary] Job {job.id} criado para itinerário {itinerary.id}")
+    return job
+
+
+async def _aheartbeat(jobs):
+    """
+    Keep heartbeat_at fresh while the job runs, even through long stages
+    that report no progress (first day, one-shot narratives).
+    """
+    while True:
+        await asyncio.sleep(settings.PLANNING_JOB_HEARTBEAT_INTERVAL)
+        await jobs.aupdate(heartbeat_at=timezone.now())
+
+
+async def arun_job(job, on_ready=None):
+    """
+    Run the planning pipeline for a claimed job, recording progress and the final status.
+    `on_ready` is passed on to agenerate_itinerary (streaming endpoints).
+
+    Every update is conditioned on `worker`: if the job was requeued and
+    claimed by another worker meanwhile, this run no longer touches it.
+    """
+    jobs = PlanningJob.objects.filter(pk=job.pk, worker=job.worker,
+                                      status=PlanningJob.STATUS_RUNNING)
+
+    async def progress(stage, percent):
+        await jobs.aupdate(stage=stage, progress=percent, heartbeat_at=timezone.now())
+
+    heartbeat = asyncio.ensure_future(_aheartbeat(jobs))
+    try:
+        itinerary = await Itinerary.objects.aget(pk=job.itinerary_id)
+        await agenerate_itinerary(itinerary, progress=progress, on_ready=on_ready)
+    except Exception as e:
+        logger.exception(f"[run_job] Job {job.id} falhou: {e}")
+        updated = await jobs.aupdate(
+            status=PlanningJob.STATUS_FAILED,
+            error=str(e),
+            finished_at=timezone.now(),
+        )
+    else:
+        updated = await jobs.aupdate(
+            status=PlanningJob.STATUS_DONE,
+            stage='done',
+            progress=100,
+            error=None,
+            finished_at=timezone.now(),
+        )
+    finally:
+        heartbeat.cancel()
+    if not updated:
+        logger.warning(f"[run_job] Job {job.id} não pertence mais a {job.worker}; resultado descartado")
+    await job.arefresh_from_db()
+    return job
+
+
+run_job = run_sync(arun_job)
+
+
+def requeue_stale_jobs():
+    """
+    Jobs em `running` sem heartbeat há mais de PLANNING_JOB_STALE_AFTER segundos
+    (worker morto) voltam para a fila, até PLANNING_JOB_MAX_ATTEMPTS tentativas.
+    Jobs que rodavam dentro de um request (IN_REQUEST_WORKERS) não são de
+    nenhum worker: se pararam de responder, são dados como falhos.
+    """
+    cutoff = timezone.now() - timedelta(seconds=settings.PLANNING_JOB_STALE_AFTER)
+    stale = PlanningJob.objects.filter(
+        status=PlanningJob.STATUS_RUNNING, heartbeat_at__lt=cutoff
+    )
+    requeued = (
+        stale.exclude(worker__in=IN_REQUEST_WORKERS)
+        .filter(attempts__lt=settings.PLANNING_JOB_MAX_ATTEMPTS)
+        .update(status=PlanningJob.STATUS_QUEUED, stage='queued', worker='')
+    )
+    failed = stale.update(
+        status=PlanningJob.STATUS_FAILED,
+        error='Worker stopped responding',
+        finished_at=timezone.now(),
+    )
+    if requeued or failed:
+        logger.warning(f"[requeue_stale_jobs] requeued={requeued} failed={failed}")
+    return requeued
+
+
+def default_worker_id():
+    return f"{socket.gethostname()}:{os.getpid()}"
+
+
+async def awork(worker_id=None, poll_interval=None, once=False):
+    """
+    Worker loop: claim jobs from the broker and run them until interrupted.
+    With `once=True` it drains the queue and returns the number of jobs run.
+
+    Every job runs on this one event loop and shares one aiohttp session,
+    so keep-alive connections to Google / OpenAI survive from job to job.
+    """
+    broker = get_broker()
+    worker_id = worker_id or default_worker_id()
+    poll_interval = poll_interval or settings.PLANNING_JOB_POLL_INTERVAL
+    processed = 0
+
+    logger.info(f"[work] Worker {worker_id} iniciado ({type(broker).__name__})")
+    async with async_session_scope():
+        while True:
+            await sync_to_async(requeue_stale_jobs)()
+            job = await sync_to_async(broker.claim)(worker_id)
+            if job is None:
+                if once:
+                    return processed
+                await asyncio.sleep(poll_interval)
+                continue
+
+            logger.info(f"[work] Worker {worker_id} executando job {job.id}")
+            await arun_job(job)
+            processed += 1
+
+
+def work(worker_id=None, poll_interval=None, once=False):
+    """
+    Sync entry point of `awork` (manage.py run_planning_worker).
+    """
+    return asyncio.run(awork(worker_id, poll_interval, once))
@@ -0,0 +1,64 @@
+import random
+import time
+
+import numpy as np
+from django.core.management.base import BaseCommand
+from geopy.distance import geodesic
+
+from itineraries.geo import HAVERSINE_MARGIN, haversine_km, within_radius
+
+
+def _best_of(repeat, func):
+    best = None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = func()
+        elapsed = time.perf_counter() - started
+        best = elapsed if best is None else min(best, elapsed)
+    return best, result
+
+
+class Command(BaseCommand):
+    help = ("Micro-benchmark do filtro de distância: geodesic um a um (filtro antigo) "
+            "× haversine vetorizada com fallback geodesic (geo.within_radius).")
+
+    def add_arguments(self, parser):
+        parser.add_argument('--candidates', type=int, default=5000)
+        parser.add_argument('--radius-km', type=float, default=25.0)
+        parser.add_argument('--repeat', type=int, default=5,
+                            help="Repetições; vale o melhor tempo.")
+        parser.add_argument('--lat', type=float, default=38.7223)
+        parser.add_argument('--lng', type=float, default=-9.1393)
+        parser.add_argument('--seed', type=int, default=42)
+
+    def handle(self, *args, **options):
+        rng = random.Random(options['seed'])
+        lat, lng, radius = options['lat'], options['lng'], options['radius_km']
+        # caixa de ~2× o raio em volta do destino: parte dos pontos fica fora
+        spread = 2 * radius / 111.0
+        points = [(lat + rng.uniform(-spread, spread), lng + rng.uniform(-spread, spread))
+                  for _ in range(options['candidates'])]
+
+        loop_time, expected = _best_of(
+            options['repeat'],
+            lambda: [geodesic((lat, lng), p).km <= radius for p in points],
+        )
+        vector_time, inside = _best_of(
+            options['repeat'],
+            lambda: within_radius(lat, lng, points, radius),
+        )
+
+        coords = np.asarray(points)
+        dist = haversine_km(lat, lng, coords[:, 0], coords[:, 1])
+        fallbacks = int(np.count_nonzero(np.abs(dist - radius) <= radius * HAVERSINE_MARGIN))
+        mismatches = int(np.count_nonzero(np.asarray(expected) != inside))
+
+        self.stdout.write(f"{len(points)} candidato(s), raio {radius} km, melhor de {options['repeat']}")
+        self.stdout.write(f"  geodesic um a um:      {loop_time * 1000:9.2f} ms")
+        self.stdout.write(f"  haversine vetorizada:  {vector_time * 1000:9.2f} ms "
+                          f"({fallbacks} conferido(s) com geodesic)")
+        self.stdout.write(f"  speedup: {loop_time / vector_time:.1f}×, divergências: {mismatches}")
+        if mismatches:
+            self.stdout.write(self.style.ERROR("O filtro vetorizado divergiu do geodesic."))
+        else:
+            self.stdout.write(self.style.SUCCESS("Mesmo resultado do filtro geodesic."))
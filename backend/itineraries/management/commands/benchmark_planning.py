@@ -0,0 +1,96 @@
+import statistics
+import time
+from contextlib import ExitStack
+from datetime import timedelta
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.test import override_settings
+from django.utils import timezone
+
+from itineraries.models import Itinerary
+from itineraries.services import (generate_itinerary, llm_cache, places_cache,
+                                  track_llm_usage, weather_cache)
+
+MODES = ('per_day', 'one_shot')
+
+
+class Command(BaseCommand):
+    help = ("Compara os modos de planejamento (per_day × one_shot) com as APIs reais: "
+            "chamadas ao GPT, tokens e tempo total por itinerário.")
+
+    def add_arguments(self, parser):
+        parser.add_argument('--destination', default='Lisbon, Portugal')
+        parser.add_argument('--days', type=int, default=3)
+        parser.add_argument('--runs', type=int, default=1,
+                            help="Itinerários gerados por modo.")
+        parser.add_argument('--modes', nargs='+', choices=MODES, default=list(MODES))
+        parser.add_argument('--use-cache', action='store_true',
+                            help="Mantém ligados os caches de Places/Weather/OpenAI, o índice "
+                                 "de lugares e o gazetteer (por padrão ficam desligados para "
+                                 "medir chamadas reais e a ordem dos modos não importar).")
+        parser.add_argument('--keep', action='store_true',
+                            help="Não apaga os itinerários gerados.")
+
+    def handle(self, *args, **options):
+        user, _ = get_user_model().objects.get_or_create(
+            username='planning-benchmark', defaults={'is_active': False}
+        )
+        start = timezone.localdate() + timedelta(days=1)     # dentro da previsão de 10 dias
+        end = start + timedelta(days=options['days'] - 1)
+
+        caches = [places_cache, weather_cache, llm_cache]
+        ttls = [cache.ttl for cache in caches]
+        stack = ExitStack()
+        if not options['use_cache']:
+            for cache in caches:
+                cache.ttl = 0
+            # o primeiro modo não pode aquecer o índice / gazetteer para os seguintes
+            stack.enter_context(override_settings(PLACE_INDEX_ENABLED=False,
+                                                  GAZETTEER_ENABLED=False))
+
+        results = {mode: [] for mode in options['modes']}
+        try:
+            for mode in options['modes']:
+                for run in range(options['runs']):
+                    itinerary = Itinerary.objects.create(
+                        user=user,
+                        destination=options['destination'],
+                        start_date=start,
+                        end_date=end,
+                        budget=Decimal(150 * options['days']),
+                        travelers=2,
+                        interests='culture, food, nightlife',
+                    )
+                    started = time.perf_counter()
+                    with track_llm_usage() as usage:
+                        generate_itinerary(itinerary, mode=mode)
+                    elapsed = time.perf_counter() - started
+                    results[mode].append((elapsed, usage))
+                    self.stdout.write(
+                        f"{mode} #{run + 1}: {elapsed:.1f}s, {usage['calls']} chamada(s), "
+                        f"{usage['prompt_tokens']}+{usage['completion_tokens']} tokens"
+                    )
+                    if not options['keep']:
+                        itinerary.delete()
+        finally:
+            for cache, ttl in zip(caches, ttls):
+                cache.ttl = ttl
+            stack.close()
+
+        self.stdout.write("")
+        self.stdout.write(f"{'modo':<10} {'tempo (s)':>10} {'chamadas':>9} "
+                          f"{'prompt':>8} {'resposta':>9} {'total':>8}")
+        for mode, runs in results.items():
+            if not runs:
+                continue
+            wall = statistics.median(elapsed for elapsed, _ in runs)
+            calls = statistics.mean(usage['calls'] for _, usage in runs)
+            prompt = statistics.mean(usage['prompt_tokens'] for _, usage in runs)
+            completion = statistics.mean(usage['completion_tokens'] for _, usage in runs)
+            self.stdout.write(f"{mode:<10} {wall:>10.1f} {calls:>9.1f} "
+                              f"{prompt:>8.0f} {completion:>9.0f} {prompt + completion:>8.0f}")
+        self.stdout.write(self.style.SUCCESS(
+            "Tokens de chamadas em streaming são estimados (~4 caracteres por token)."
+        ))
@@ -0,0 +1,66 @@
+import random
+import statistics
+import time
+
+from django.core.management.base import BaseCommand
+
+from itineraries.routing import optimize_route, route_km
+
+ROLES = ["breakfast", "morning", "lunch", "afternoon", "dinner", "evening"]
+
+
+def _synthetic_city(rng, roles, candidates):
+    """
+    Candidates of every slot scattered over 3–5 neighborhoods of a ~20 km city.
+    """
+    lat, lng = rng.uniform(-50, 60), rng.uniform(-120, 140)
+    hoods = [(lat + rng.gauss(0, 0.06), lng + rng.gauss(0, 0.06))
+             for _ in range(rng.randint(3, 5))]
+    options = {}
+    for role in roles:
+        points = []
+        for _ in range(candidates):
+            h_lat, h_lng = rng.choice(hoods)
+            points.append((h_lat + rng.gauss(0, 0.01), h_lng + rng.gauss(0, 0.01)))
+        options[role] = points
+    return options
+
+
+class Command(BaseCommand):
+    help = ("Micro-benchmark da ordenação dos slots do dia (routing.optimize_route) "
+            "em cidades sintéticas: tempo por dia e km economizados sobre a ordem do GPT.")
+
+    def add_arguments(self, parser):
+        parser.add_argument('--cities', type=int, default=200)
+        parser.add_argument('--candidates', type=int, nargs='+', default=[1, 3, 6],
+                            help="Candidatos do ranking por slot.")
+        parser.add_argument('--flexible', type=int, nargs='+', default=[2, 4],
+                            help="Quantos slots podem trocar de posição.")
+        parser.add_argument('--penalty-km', type=float, default=1.5)
+        parser.add_argument('--seed', type=int, default=42)
+
+    def handle(self, *args, **options):
+        self.stdout.write(f"{'cand.':>5} {'flex':>4} {'mediana ms':>11} {'máx ms':>8} "
+                          f"{'km GPT':>7} {'km rota':>8} {'economia':>9}")
+        for flexible in options['flexible']:
+            flex_roles = ROLES[1:1 + flexible]
+            for candidates in options['candidates']:
+                rng = random.Random(options['seed'])
+                timings, before, after = [], [], []
+                for _ in range(options['cities']):
+                    city = _synthetic_city(rng, ROLES, candidates)
+                    started = time.perf_counter()
+                    order, picks = optimize_route(ROLES, city, options['penalty_km'], flex_roles)
+                    timings.append((time.perf_counter() - started) * 1000)
+                    before.append(route_km([city[role][0] for role in ROLES]))
+                    after.append(route_km([city[role][pick] for role, pick in zip(order, picks)]))
+
+                saved = 1 - sum(after) / sum(before) if sum(before) else 0.0
+                self.stdout.write(
+                    f"{candidates:>5} {flexible:>4} {statistics.median(timings):>11.3f} "
+                    f"{max(timings):>8.3f} {statistics.mean(before):>7.1f} "
+                    f"{statistics.mean(after):>8.1f} {saved:>8.0%}"
+                )
+        self.stdout.write(self.style.SUCCESS(
+            f"{options['cities']} cidade(s) sintética(s) por linha, 6 slots por dia."
+        ))
@@ -0,0 +1,23 @@
+from django.core.management.base import BaseCommand
+
+from itineraries.jobs import work
+
+
+class Command(BaseCommand):
+    help = "Consome a fila de PlanningJob e gera os itinerários (rode N processos para N workers)."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--worker-id', default=None,
+                            help="Identificador do worker (padrão: host:pid).")
+        parser.add_argument('--poll-interval', type=float, default=None,
+                            help="Segundos entre consultas quando a fila está vazia.")
+        parser.add_argument('--once', action='store_true',
+                            help="Processa os jobs pendentes e sai.")
+
+    def handle(self, *args, **options):
+        processed = work(
+            worker_id=options['worker_id'],
+            poll_interval=options['poll_interval'],
+            once=options['once'],
+        )
+        self.stdout.write(self.style.SUCCESS(f"{processed} job(s) processado(s)."))
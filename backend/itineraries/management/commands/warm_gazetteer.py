@@ -0,0 +1,36 @@
+from django.core.management.base import BaseCommand
+
+from itineraries.gazetteer import lookup_destination, store_destination
+from itineraries.models import Itinerary
+
+
+class Command(BaseCommand):
+    help = "Preenche o gazetteer de destinos a partir dos itinerários existentes."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--geocode', action='store_true',
+                            help="Chama a Geocoding API para destinos sem lat/lng salvos.")
+
+    def handle(self, *args, **options):
+        stored = skipped = geocoded = 0
+        rows = (
+            Itinerary.objects
+            .order_by('-created_at')
+            .values_list('destination', 'lat', 'lng')
+        )
+        for destination, lat, lng in rows:
+            if lookup_destination(destination):
+                skipped += 1
+                continue
+            if lat is not None and lng is not None:
+                if store_destination(destination, lat, lng):
+                    stored += 1
+            elif options['geocode']:
+                from itineraries.services import get_cordinates_google_geocoding
+                lat, lng = get_cordinates_google_geocoding(destination)
+                if lat is not None:
+                    geocoded += 1
+
+        self.stdout.write(self.style.SUCCESS(
+            f"{stored} destino(s) gravado(s), {geocoded} geocodificado(s), {skipped} já conhecido(s)."
+        ))
@@ -0,0 +1,18 @@
+# Generated by Django 5.1.6 on 2026-10-17 19:09
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('itineraries', '0018_destination_gazetteer'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='day',
+            name='alternates',
+            field=models.JSONField(blank=True, default=dict),
+        ),
+    ]
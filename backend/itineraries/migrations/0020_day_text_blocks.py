@@ -0,0 +1,18 @@
+# Generated by Django 5.1.6 on 2026-10-17 19:11
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('itineraries', '0019_day_alternates'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='day',
+            name='text_blocks',
+            field=models.JSONField(blank=True, null=True),
+        ),
+    ]
@@ -0,0 +1,44 @@
+# Generated by Django 5.1.6 on 2026-10-17 19:15
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('itineraries', '0020_day_text_blocks'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Place',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('place_id', models.CharField(max_length=255, unique=True)),
+                ('name', models.CharField(max_length=255)),
+                ('address', models.CharField(blank=True, max_length=500, null=True)),
+                ('lat', models.FloatField()),
+                ('lng', models.FloatField()),
+                ('geohash', models.CharField(db_index=True, max_length=12)),
+                ('rating', models.FloatField(blank=True, null=True)),
+                ('user_ratings_total', models.PositiveIntegerField(blank=True, null=True)),
+                ('price_level', models.PositiveSmallIntegerField(blank=True, null=True)),
+                ('business_status', models.CharField(blank=True, default='', max_length=40)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='PlaceCategory',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('category', models.CharField(max_length=200)),
+                ('geohash', models.CharField(max_length=12)),
+                ('place', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='categories', to='itineraries.place')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['category', 'geohash'], name='place_category_geohash_idx')],
+                'constraints': [models.UniqueConstraint(fields=('place', 'category'), name='unique_place_category')],
+            },
+        ),
+    ]
@@ -0,0 +1,32 @@
+# Generated by Django 5.1.6 on 2026-10-17 19:17
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('itineraries', '0021_place_index'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DayStop',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('order', models.PositiveSmallIntegerField()),
+                ('role', models.CharField(blank=True, default='', max_length=30)),
+                ('name', models.CharField(max_length=255)),
+                ('lat', models.FloatField()),
+                ('lng', models.FloatField()),
+                ('address', models.CharField(blank=True, max_length=500, null=True)),
+                ('day', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='stops', to='itineraries.day')),
+                ('place', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='stops', to='itineraries.place')),
+            ],
+            options={
+                'ordering': ['day', 'order'],
+                'constraints': [models.UniqueConstraint(fields=('day', 'order'), name='unique_day_stop_order')],
+            },
+        ),
+    ]
@@ -0,0 +1,100 @@
+import json
+
+from django.db import migrations
+
+BATCH_SIZE = 500
+
+# cópia congelada de itineraries.geo.geohash_encode: a migração não pode
+# depender do código atual do app
+GEOHASH_ALPHABET = "0123456789bcdefghjkmnpqrstuvwxyz"
+GEOHASH_PRECISION = 9
+
+
+def geohash_encode(lat, lng, precision=GEOHASH_PRECISION):
+    lat_range, lng_range = [-90.0, 90.0], [-180.0, 180.0]
+    chars, bits, value, even = [], 0, 0, True
+    while len(chars) < precision:
+        rng, coord = (lng_range, lng) if even else (lat_range, lat)
+        mid = (rng[0] + rng[1]) / 2
+        value <<= 1
+        if coord >= mid:
+            value |= 1
+            rng[0] = mid
+        else:
+            rng[1] = mid
+        even = not even
+        bits += 1
+        if bits == 5:
+            chars.append(GEOHASH_ALPHABET[value])
+            bits, value = 0, 0
+    return "".join(chars)
+
+
+def _records(day):
+    try:
+        places = json.loads(day.places_visited or "[]")
+    except ValueError:
+        return []
+    if not isinstance(places, list):
+        return []
+    records = []
+    for place in places:
+        try:
+            records.append({
+                "role": place.get("role") or "",
+                "name": str(place["name"])[:255],
+                "lat": float(place["lat"]),
+                "lng": float(place["lng"]),
+                "address": (place.get("address") or "")[:500] or None,
+                "place_id": place.get("place_id"),
+            })
+        except (AttributeError, KeyError, TypeError, ValueError):
+            continue
+    return records
+
+
+def _flush(Place, DayStop, pending):
+    new = {}
+    for _, rec in pending:
+        if rec["place_id"]:
+            new[rec["place_id"]] = Place(
+                place_id=rec["place_id"], name=rec["name"], address=rec["address"],
+                lat=rec["lat"], lng=rec["lng"], geohash=geohash_encode(rec["lat"], rec["lng"]),
+            )
+    Place.objects.bulk_create(new.values(), ignore_conflicts=True)
+    ids = dict(Place.objects.filter(place_id__in=new).values_list("place_id", "id"))
+    DayStop.objects.bulk_create([
+        DayStop(day_id=day_id, order=order, role=rec["role"], name=rec["name"],
+                lat=rec["lat"], lng=rec["lng"], address=rec["address"],
+                place_id=ids.get(rec["place_id"]))
+        for (day_id, order), rec in pending
+    ], ignore_conflicts=True)
+
+
+def forwards(apps, schema_editor):
+    Day = apps.get_model("itineraries", "Day")
+    Place = apps.get_model("itineraries", "Place")
+    DayStop = apps.get_model("itineraries", "DayStop")
+
+    pending = []
+    days = Day.objects.exclude(places_visited__isnull=True).exclude(places_visited="")
+    for day in days.only("id", "places_visited").iterator(chunk_size=BATCH_SIZE):
+        for order, rec in enumerate(_records(day)):
+            pending.append(((day.id, order), rec))
+        if len(pending) >= BATCH_SIZE:
+            _flush(Place, DayStop, pending)
+            pending = []
+    if pending:
+        _flush(Place, DayStop, pending)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('itineraries', '0022_daystop'),
+    ]
+
+    operations = [
+        # places_visited continua preenchido: voltar é só apagar as paradas
+        migrations.RunPython(forwards, migrations.RunPython.noop),
+    ]
@@ -49,6 +49,17 @@ class Day(FirebaseModelMixin, models.Model):
     #   {"name": "Museu do Louvre", "lat":48.8606, "lng":2.3376}
     # ]
 
+    # Próximos candidatos do ranking de cada slot (chave = role do plano),
+    # para trocar um lugar sem nova busca:
+    # {"breakfast": [{"name": ..., "lat": ..., "lng": ..., "place_id": ..., "address": ...}, ...],
+    #  "morning": [...], "lunch": [...], "afternoon": [...], "dinner": [...], "evening": [...]}
+    alternates = models.JSONField(default=dict, blank=True)
+
+    # generated_text dividido em blocos endereçáveis, na ordem do texto:
+    # [{"key": "header", "text": ...}, {"key": "breakfast", ...}, ..., {"key": "final_tip", ...}]
+    # Trocar um lugar reescreve só o bloco dele. Nulo se o texto não pôde ser dividido.
+    text_blocks = models.JSONField(null=True, blank=True)
+
     created_at = models.DateTimeField(auto_now_add=True)
 
     def __str__(self):
@@ -66,6 +77,168 @@ class Review(FirebaseModelMixin, models.Model):
         return f"Review {self.rating} by {self.user.username} on {self.itinerary.destination}"
 
 
+class PlanningJob(models.Model):
+    """
+    Geração assíncrona de um itinerário (ver itineraries/jobs.py).
+    A view cria o job e responde na hora; um worker executa as etapas
+    e vai atualizando `stage` / `progress` para o cliente acompanhar.
+    """
+    STATUS_QUEUED = 'queued'
+    STATUS_RUNNING = 'running'
+    STATUS_DONE = 'done'
+    STATUS_FAILED = 'failed'
+    STATUS_CHOICES = [
+        (STATUS_QUEUED, 'Queued'),
+        (STATUS_RUNNING, 'Running'),
+        (STATUS_DONE, 'Done'),
+        (STATUS_FAILED, 'Failed'),
+    ]
+
+    itinerary = models.ForeignKey(Itinerary, on_delete=models.CASCADE, related_name='jobs')
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default=STATUS_QUEUED, db_index=True)
+    stage = models.CharField(max_length=40, blank=True, default='')
+    progress = models.PositiveSmallIntegerField(default=0)
+    error = models.TextField(null=True, blank=True)
+    attempts = models.PositiveSmallIntegerField(default=0)
+    worker = models.CharField(max_length=100, blank=True, default='')
+
+    created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    heartbeat_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        ordering = ['created_at']
+
+    def __str__(self):
+        return f"Job {self.id} ({self.status}) - {self.itinerary.destination}"
+
+    @property
+    def is_finished(self):
+        return self.status in (self.STATUS_DONE, self.STATUS_FAILED)
+
+
+class Destination(models.Model):
+    """
+    Gazetteer de destinos já geocodificados (ver itineraries/gazetteer.py).
+    """
+    name = models.CharField(max_length=200)          # nome canônico (formatted_address)
+    lat = models.DecimalField(max_digits=9, decimal_places=6)
+    lng = models.DecimalField(max_digits=9, decimal_places=6)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return self.name
+
+
+class DestinationAlias(models.Model):
+    """
+    Forma normalizada de um texto digitado pelo usuário → Destination.
+    "Paris", "paris, france" e "PARÍS" apontam para o mesmo destino.
+    """
+    alias = models.CharField(max_length=200, unique=True)
+    destination = models.ForeignKey(Destination, on_delete=models.CASCADE, related_name='aliases')
+
+    def __str__(self):
+        return f"{self.alias} → {self.destination.name}"
+
+
+class ApiCacheEntry(models.Model):
+    """
+    Resposta de API externa guardada por itineraries/cache.py.
+    `namespace` separa os caches (places, ...); `key` é o hash da consulta normalizada.
+    """
+    namespace = models.CharField(max_length=30)
+    key = models.CharField(max_length=64)
+    payload = models.JSONField()
+    hits = models.PositiveIntegerField(default=0)
+
+    created_at = models.DateTimeField(auto_now_add=True)
+    expires_at = models.DateTimeField(db_index=True)
+    last_used_at = models.DateTimeField(db_index=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['namespace', 'key'], name='unique_api_cache_key'),
+        ]
+
+    def __str__(self):
+        return f"{self.namespace}:{self.key[:12]} ({self.hits} hits)"
+
+
+
+class Place(models.Model):
+    """
+    Lugar já devolvido pelo Places (ver itineraries/place_index.py).
+    `geohash` permite buscar por raio com prefixos indexados.
+    """
+    place_id = models.CharField(max_length=255, unique=True)
+    name = models.CharField(max_length=255)
+    address = models.CharField(max_length=500, null=True, blank=True)
+    lat = models.FloatField()
+    lng = models.FloatField()
+    geohash = models.CharField(max_length=12, db_index=True)
+    rating = models.FloatField(null=True, blank=True)
+    user_ratings_total = models.PositiveIntegerField(null=True, blank=True)
+    price_level = models.PositiveSmallIntegerField(null=True, blank=True)
+    business_status = models.CharField(max_length=40, blank=True, default='')
+
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return self.name
+
+
+class PlaceCategory(models.Model):
+    """
+    Categoria (normalizada) em que um Place apareceu numa busca
+    ("traditional pastry shop"). O geohash é repetido aqui para que
+    categoria + raio seja uma única varredura do índice.
+    """
+    place = models.ForeignKey(Place, on_delete=models.CASCADE, related_name='categories')
+    category = models.CharField(max_length=200)
+    geohash = models.CharField(max_length=12)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['place', 'category'], name='unique_place_category'),
+        ]
+        indexes = [
+            models.Index(fields=['category', 'geohash'], name='place_category_geohash_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.category}: {self.place_id}"
+
+
+
+class DayStop(models.Model):
+    """
+    Parada de um Day, na ordem do roteiro (ver itineraries/stops.py).
+    O servidor lê daqui — marcadores, PDF, troca de lugar, lugares já usados
+    na viagem — com uma consulta indexada; Day.places_visited continua com o
+    mesmo conteúdo em JSON para os clientes da API.
+    """
+    day = models.ForeignKey(Day, on_delete=models.CASCADE, related_name='stops')
+    place = models.ForeignKey(Place, on_delete=models.SET_NULL, null=True, blank=True,
+                              related_name='stops')
+    order = models.PositiveSmallIntegerField()
+    role = models.CharField(max_length=30, blank=True, default='')
+    name = models.CharField(max_length=255)
+    lat = models.FloatField()
+    lng = models.FloatField()
+    address = models.CharField(max_length=500, null=True, blank=True)
+
+    class Meta:
+        ordering = ['day', 'order']
+        constraints = [
+            models.UniqueConstraint(fields=['day', 'order'], name='unique_day_stop_order'),
+        ]
+
+    def __str__(self):
+        return f"{self.order}. {self.name} ({self.role})"
+
+
 # Connect signals for Firebase synchronization
 if getattr(settings, 'USE_FIREBASE', False):
     post_save.connect(sync_to_firestore, sender=Itinerary)
@@ -0,0 +1,119 @@
+# place_index.py
+
+"""
+Índice local dos lugares já vistos no Places (tabelas Place / PlaceCategory).
+
+Cada página de Text Search devolvida para "<categoria> in <destino>" é
+gravada com a categoria normalizada e o geohash de cada lugar. Antes de ir
+ao Places, o planejador pergunta ao índice por categoria + raio: os
+prefixos de geohash que cobrem o círculo (geo.geohash_cover) viram uma
+varredura do índice (category, geohash), e a distância exata é conferida
+depois pelo mesmo filtro dos resultados do Places. Só quando o índice não
+tem candidatos suficientes a busca sai para o Google.
+
+Falhas de banco nunca quebram o planejamento: viram "sem cobertura".
+"""
+
+import logging
+from datetime import timedelta
+from functools import reduce
+from operator import or_
+
+from django.conf import settings
+from django.db import DatabaseError
+from django.db.models import Q
+from django.utils import timezone
+
+from .cache import normalize_text
+from .geo import geohash_cover, geohash_encode
+from .models import Place, PlaceCategory
+
+logger = logging.getLogger(__name__)
+
+PLACE_FIELDS = ["name", "address", "lat", "lng", "geohash", "rating",
+                "user_ratings_total", "price_level", "business_status"]
+
+
+def _place_from_candidate(cand):
+    loc = cand["geometry"]["location"]
+    lat, lng = float(loc["lat"]), float(loc["lng"])
+    return Place(
+        place_id=cand["place_id"],
+        name=cand["name"][:255],
+        address=(cand.get("formatted_address") or "")[:500] or None,
+        lat=lat,
+        lng=lng,
+        geohash=geohash_encode(lat, lng),
+        rating=cand.get("rating"),
+        user_ratings_total=cand.get("user_ratings_total"),
+        price_level=cand.get("price_level"),
+        business_status=cand.get("business_status") or "",
+    )
+
+
+def _candidate_from_place(place):
+    """
+    Place row in the shape of a Places Text Search result.
+    """
+    cand = {
+        "name": place.name,
+        "place_id": place.place_id,
+        "formatted_address": place.address,
+        "geometry": {"location": {"lat": place.lat, "lng": place.lng}},
+        "business_status": place.business_status,
+    }
+    # como no Places: campos sem valor ficam de fora
+    for field in ("rating", "user_ratings_total", "price_level"):
+        if getattr(place, field) is not None:
+            cand[field] = getattr(place, field)
+    return cand
+
+
+def store_places(category, candidates):
+    """
+    Upsert the results of a "<category> in <destination>" search.
+    """
+    category = normalize_text(category)[:200]
+    places = []
+    for cand in candidates:
+        try:
+            if cand.get("place_id"):
+                places.append(_place_from_candidate(cand))
+        except (KeyError, TypeError, ValueError):
+            continue
+    if not category or not places:
+        return
+    try:
+        Place.objects.bulk_create(places, update_conflicts=True, unique_fields=["place_id"],
+                                  update_fields=PLACE_FIELDS + ["updated_at"])
+        ids = dict(Place.objects.filter(place_id__in=[p.place_id for p in places])
+                   .values_list("place_id", "id"))
+        PlaceCategory.objects.bulk_create(
+            [PlaceCategory(place_id=ids[p.place_id], category=category, geohash=p.geohash)
+             for p in places if p.place_id in ids],
+            ignore_conflicts=True,
+        )
+    except DatabaseError as e:
+        logger.warning(f"[place_index] store falhou: {e}")
+
+
+def lookup_places(category, lat, lng, radius_km):
+    """
+    Fresh indexed places of `category` within reach of (lat, lng), as
+    Places-like results. Coarse: callers still apply the exact distance
+    (validate_google_places).
+    """
+    prefixes = geohash_cover(float(lat), float(lng), radius_km)
+    fresh = timezone.now() - timedelta(days=settings.PLACE_INDEX_MAX_AGE_DAYS)
+    try:
+        rows = (
+            PlaceCategory.objects
+            .filter(category=normalize_text(category)[:200])
+            .filter(reduce(or_, (Q(geohash__startswith=p) for p in prefixes)))
+            .filter(place__updated_at__gte=fresh)
+            .select_related("place")
+        )
+        return [_candidate_from_place(row.place) for row in rows]
+    except DatabaseError as e:
+        logger.warning(f"[place_index] lookup falhou: {e}")
+        return []
@@ -0,0 +1,89 @@
+# ranking.py
+
+"""
+Ranking dos candidatos do Places para um slot do dia.
+
+Em vez de ficar com o primeiro resultado válido da página, cada candidato
+recebe uma nota de 0 a 1 combinando:
+
+- rating (0–5);
+- número de avaliações (log, satura em REVIEWS_SATURATION) — um 4.9 com
+  três avaliações não passa na frente de um 4.6 com duas mil;
+- distância até as outras paradas do dia (centroide), relativa ao raio;
+- quanto o price_level combina com o orçamento por pessoa por dia.
+
+Os que sobram no ranking viram o pool de alternativas do slot.
+"""
+
+import numpy as np
+
+from .geo import haversine_km
+
+WEIGHTS = {"rating": 0.40, "reviews": 0.20, "distance": 0.25, "price": 0.15}
+REVIEWS_SATURATION = 2000
+# teto de gasto por pessoa/dia para cada price_level do Google (acima → 4)
+PRICE_LEVEL_CEILINGS = [(1, 60), (2, 150), (3, 300)]
+NEUTRAL = 0.5           # nota de um critério sem dado (sem price_level, sem paradas)
+
+
+def target_price_level(budget, travelers, days):
+    """
+    Google price_level (1–4) that fits the trip budget, or None without a budget.
+    """
+    if not budget:
+        return None
+    per_person_day = float(budget) / max(travelers or 1, 1) / max(days, 1)
+    for level, ceiling in PRICE_LEVEL_CEILINGS:
+        if per_person_day <= ceiling:
+            return level
+    return 4
+
+
+def _column(candidates, field):
+    values = []
+    for cand in candidates:
+        try:
+            values.append(float(cand[field]))
+        except (KeyError, TypeError, ValueError):
+            values.append(np.nan)
+    return np.asarray(values, dtype=float)
+
+
+def score_candidates(candidates, anchors, max_km, target_price=None):
+    """
+    Score (0–1) of every candidate. `anchors` are the (lat, lng) of the
+    stops already chosen for the day (or the destination itself).
+    """
+    if not candidates:
+        return np.zeros(0)
+
+    rating = np.nan_to_num(_column(candidates, "rating"), nan=0.0) / 5.0
+    reviews = np.log1p(np.nan_to_num(_column(candidates, "user_ratings_total"), nan=0.0))
+    reviews = np.minimum(reviews / np.log1p(REVIEWS_SATURATION), 1.0)
+
+    if anchors:
+        center = np.asarray(anchors, dtype=float).reshape(-1, 2).mean(axis=0)
+        lats = np.asarray([c["geometry"]["location"]["lat"] for c in candidates], dtype=float)
+        lngs = np.asarray([c["geometry"]["location"]["lng"] for c in candidates], dtype=float)
+        dist = haversine_km(center[0], center[1], lats, lngs)
+        distance = 1.0 - np.clip(dist / max_km, 0.0, 1.0)
+    else:
+        distance = np.full(len(candidates), NEUTRAL)
+
+    if target_price is None:
+        price = np.full(len(candidates), NEUTRAL)
+    else:
+        levels = _column(candidates, "price_level")
+        price = np.where(np.isnan(levels), NEUTRAL, 1.0 - np.abs(levels - target_price) / 4.0)
+
+    return (WEIGHTS["rating"] * rating + WEIGHTS["reviews"] * reviews
+            + WEIGHTS["distance"] * distance + WEIGHTS["price"] * price)
+
+
+def rank_candidates(candidates, anchors, max_km, target_price=None):
+    """
+    Candidates sorted by score, best first (ties keep the Places order).
+    """
+    scores = score_candidates(candidates, anchors, max_km, target_price)
+    order = np.argsort(-scores, kind="stable")
+    return [candidates[i] for i in order]
@@ -0,0 +1,347 @@
+# resilience.py
+
+"""
+Política de retry compartilhada pelas chamadas externas.
+
+- backoff exponencial com jitter ("full jitter"), limitado a RETRY_MAX_DELAY;
+- só tenta de novo erros retentáveis (timeout, conexão, 429/5xx);
+- respeita o prazo do request atual (`with deadline(segundos):`), que é
+  propagado para as tasks do asyncio via contextvars;
+- um orçamento global de retries por processo (RetryBudget) evita que uma
+  instabilidade vire uma tempestade de retries;
+- um circuit breaker por upstream (Places, Weather, Geocoding, OpenAI) corta
+  as chamadas enquanto o serviço está fora, em vez de cada request esperar
+  todos os retries.
+"""
+
+import asyncio
+import contextvars
+import logging
+import random
+import threading
+import time
+from contextlib import contextmanager
+
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+_deadline = contextvars.ContextVar("upstream_deadline", default=None)
+
+_policies = {}
+_breakers = {}
+
+
+class DeadlineExceeded(Exception):
+    """
+    The time budget of the current request/job was spent before the call.
+    """
+
+
+@contextmanager
+def deadline(seconds):
+    """
+    Time budget (in seconds) for every upstream call inside the block.
+    A nested block can only shorten the budget, never extend it.
+    """
+    new = time.monotonic() + seconds
+    current = _deadline.get()
+    if current is not None:
+        new = min(new, current)
+    token = _deadline.set(new)
+    try:
+        yield
+    finally:
+        _deadline.reset(token)
+
+
+def remaining_time():
+    """
+    Seconds left in the current deadline, or None when there is no deadline.
+    """
+    current = _deadline.get()
+    return None if current is None else current - time.monotonic()
+
+
+class CircuitOpenError(Exception):
+    """
+    The upstream's circuit breaker is open; the call was not attempted.
+    """
+
+
+class CircuitBreaker:
+    """
+    closed → (failure_threshold falhas seguidas) → open
+    open → (recovery_timeout segundos) → half-open: deixa passar uma chamada de teste
+    half-open → sucesso fecha o circuito, falha abre de novo.
+
+    A chamada de teste que não termina em sucesso nem em falha (cancelada)
+    devolve a vez com `release_probe`; e um teste que passou de
+    recovery_timeout sem resposta é dado como perdido, para o circuito não
+    ficar preso em half-open.
+    """
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(self, name, failure_threshold=None, recovery_timeout=None):
+        self.name = name
+        self.failure_threshold = failure_threshold or settings.CIRCUIT_FAILURE_THRESHOLD
+        self.recovery_timeout = recovery_timeout or settings.CIRCUIT_RECOVERY_TIMEOUT
+        self._state = self.CLOSED
+        self._failures = 0
+        self._opened_at = None
+        self._probe_in_flight = False
+        self._probe_started_at = None
+        self._lock = threading.Lock()
+        self._counters = {"trips": 0, "rejected": 0, "failures": 0, "successes": 0}
+        _breakers[name] = self
+
+    @property
+    def state(self):
+        with self._lock:
+            return self._current_state()
+
+    def _current_state(self):
+        if self._state == self.OPEN and time.monotonic() - self._opened_at >= self.recovery_timeout:
+            self._state = self.HALF_OPEN
+            self._probe_in_flight = False
+        return self._state
+
+    def before_call(self):
+        """
+        Raise CircuitOpenError unless a call may go through right now.
+        """
+        with self._lock:
+            state = self._current_state()
+            if state == self.CLOSED:
+                return
+            if state == self.HALF_OPEN and (
+                not self._probe_in_flight
+                or time.monotonic() - self._probe_started_at >= self.recovery_timeout
+            ):
+                self._probe_in_flight = True
+                self._probe_started_at = time.monotonic()
+                return
+            self._counters["rejected"] += 1
+        raise CircuitOpenError(f"{self.name} circuit is open")
+
+    def release_probe(self):
+        """
+        The half-open probe ended without an outcome (e.g. it was cancelled):
+        let the next call probe instead.
+        """
+        with self._lock:
+            self._probe_in_flight = False
+
+    def record_success(self):
+        with self._lock:
+            self._counters["successes"] += 1
+            self._failures = 0
+            self._state = self.CLOSED
+            self._probe_in_flight = False
+
+    def record_failure(self):
+        with self._lock:
+            self._counters["failures"] += 1
+            self._failures += 1
+            state = self._current_state()
+            if state == self.HALF_OPEN or (state == self.CLOSED and self._failures >= self.failure_threshold):
+                self._state = self.OPEN
+                self._opened_at = time.monotonic()
+                self._probe_in_flight = False
+                self._counters["trips"] += 1
+                logger.error(f"[CircuitBreaker:{self.name}] aberto após {self._failures} falha(s)")
+
+    def stats(self):
+        with self._lock:
+            stats = dict(self._counters)
+            stats["state"] = self._current_state()
+            stats["consecutive_failures"] = self._failures
+            if self._state != self.CLOSED:
+                stats["open_for_seconds"] = round(time.monotonic() - self._opened_at, 1)
+        return stats
+
+
+class RetryBudget:
+    """
+    Token bucket: cada request deposita `ratio` fichas e cada retry gasta uma.
+    Além disso a reserva se recompõe a `min_per_second`, para que um processo
+    com pouco tráfego ainda consiga tentar de novo.
+    """
+
+    def __init__(self, ratio, min_per_second, max_tokens=None):
+        self.ratio = ratio
+        self.min_per_second = min_per_second
+        self.max_tokens = max_tokens or max(10.0, min_per_second * 10)
+        self._tokens = self.max_tokens
+        self._last = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self):
+        now = time.monotonic()
+        self._tokens = min(self.max_tokens, self._tokens + (now - self._last) * self.min_per_second)
+        self._last = now
+
+    def record_request(self):
+        with self._lock:
+            self._refill()
+            self._tokens = min(self.max_tokens, self._tokens + self.ratio)
+
+    def try_spend(self):
+        with self._lock:
+            self._refill()
+            if self._tokens >= 1:
+                self._tokens -= 1
+                return True
+            return False
+
+    @property
+    def tokens(self):
+        with self._lock:
+            self._refill()
+            return round(self._tokens, 2)
+
+
+retry_budget = RetryBudget(ratio=settings.RETRY_BUDGET_RATIO,
+                           min_per_second=settings.RETRY_BUDGET_MIN_PER_SECOND)
+
+
+class RetryPolicy:
+
+    def __init__(self, name, is_retryable, max_attempts=3,
+                 base_delay=0.5, max_delay=None, budget=retry_budget):
+        self.name = name
+        self.is_retryable = is_retryable
+        self.max_attempts = max_attempts
+        self.base_delay = base_delay
+        self.max_delay = max_delay if max_delay is not None else settings.RETRY_MAX_DELAY
+        self.budget = budget
+        self._lock = threading.Lock()
+        self._counters = {
+            "calls": 0, "retries": 0, "failures": 0,
+            "budget_exhausted": 0, "deadline_exceeded": 0,
+        }
+        _policies[name] = self
+
+    def _count(self, name):
+        with self._lock:
+            self._counters[name] += 1
+
+    def backoff(self, attempt):
+        """
+        Full jitter: uniform between 0 and base_delay * 2**(attempt-1), capped.
+        """
+        return random.uniform(0, min(self.max_delay, self.base_delay * 2 ** (attempt - 1)))
+
+    def _start(self):
+        self._count("calls")
+        if self.budget:
+            self.budget.record_request()
+
+    def _before_attempt(self, breaker, description):
+        remaining = remaining_time()
+        if remaining is not None and remaining <= 0:
+            self._count("deadline_exceeded")
+            raise DeadlineExceeded(f"[{self.name}] deadline exceeded – {description}")
+        if breaker:
+            breaker.before_call()
+        return remaining
+
+    def _after_failure(self, exc, attempt, max_attempts, breaker, description):
+        """
+        Must be called from the `except` block: re-raises `exc` when the call
+        should stop, otherwise returns the delay before the next attempt.
+        """
+        logger.warning(f"[{self.name}] {attempt}/{max_attempts} – {exc} – {description}")
+        retryable = self.is_retryable(exc)
+        if breaker and retryable:
+            breaker.record_failure()
+        elif breaker:
+            # erro do cliente (4xx) não indica que o upstream caiu
+            breaker.record_success()
+        if attempt == max_attempts or not retryable:
+            self._count("failures")
+            raise
+
+        delay = self.backoff(attempt)
+        remaining = remaining_time()
+        if remaining is not None and delay >= remaining:
+            self._count("deadline_exceeded")
+            self._count("failures")
+            raise
+        if self.budget and not self.budget.try_spend():
+            self._count("budget_exhausted")
+            self._count("failures")
+            raise
+        self._count("retries")
+        return delay
+
+    def call(self, func, max_attempts=None, description="", breaker=None):
+        """
+        Call `func(timeout_cap)` until it succeeds or retrying is pointless.
+        `timeout_cap` is the time left in the current deadline (None if unbounded)
+        so callers can clamp their own network timeout to it.
+
+        With a `breaker`, every attempt asks it first (CircuitOpenError ends
+        the loop at once) and retryable failures count towards tripping it.
+        """
+        max_attempts = max_attempts or self.max_attempts
+        self._start()
+        for attempt in range(1, max_attempts + 1):
+            remaining = self._before_attempt(breaker, description)
+            try:
+                result = func(remaining)
+            except Exception as e:
+                time.sleep(self._after_failure(e, attempt, max_attempts, breaker, description))
+            except BaseException:
+                if breaker:
+                    breaker.release_probe()
+                raise
+            else:
+                if breaker:
+                    breaker.record_success()
+                return result
+
+    async def acall(self, func, max_attempts=None, description="", breaker=None):
+        """
+        Same as `call` for a coroutine function; the back-off does not block the event loop.
+        """
+        max_attempts = max_attempts or self.max_attempts
+        self._start()
+        for attempt in range(1, max_attempts + 1):
+            remaining = self._before_attempt(breaker, description)
+            try:
+                result = await func(remaining)
+            except Exception as e:
+                await asyncio.sleep(self._after_failure(e, attempt, max_attempts, breaker, description))
+            except BaseException:
+                # CancelledError (gather_limited / overview cancelados) não é
+                # sucesso nem falha do upstream
+                if breaker:
+                    breaker.release_probe()
+                raise
+            else:
+                if breaker:
+                    breaker.record_success()
+                return result
+
+    def stats(self):
+        with self._lock:
+            return dict(self._counters)
+
+
+def retry_stats():
+    """
+    Counters of every retry policy in this process, plus the shared budget.
+    """
+    stats = {name: policy.stats() for name, policy in _policies.items()}
+    stats["budget_tokens"] = retry_budget.tokens
+    return stats
+
+
+def breaker_stats():
+    """
+    State and trip counts of every circuit breaker in this process.
+    """
+    return {name: breaker.stats() for name, breaker in _breakers.items()}
@@ -0,0 +1,95 @@
+# routing.py
+
+"""
+Ordem dos lugares de um dia pelo menor deslocamento.
+
+As refeições ficam nas suas janelas (café, almoço, jantar) e o
+entretenimento da noite fica no fim do dia; só as atividades "flexíveis"
+trocam de posição entre si. Para cada ordem possível das flexíveis, um
+Viterbi sobre a matriz de distâncias (pré-calculada uma vez) escolhe, em
+cada slot, um dos primeiros candidatos do ranking: cada posição abaixo do
+primeiro custa `rank_penalty_km` de "distância" a mais, então um candidato
+pior só entra quando economiza caminho de verdade.
+
+Com 6 slots, 2 flexíveis e 3 candidatos por slot são 2 ordens × 6 camadas de
+3×3 — bem abaixo de um milissegundo (ver `manage.py benchmark_routing`).
+"""
+
+import itertools
+
+import numpy as np
+
+from .geo import haversine_km
+
+FLEXIBLE_ROLES = ("morning", "afternoon")
+
+
+def distance_matrix(points):
+    """
+    Pairwise great-circle distances (km) between (lat, lng) points.
+    """
+    pts = np.asarray(points, dtype=float).reshape(-1, 2)
+    return haversine_km(pts[:, 0][:, None], pts[:, 1][:, None],
+                        pts[:, 0][None, :], pts[:, 1][None, :])
+
+
+def _best_picks(layers, dist, rank_penalty_km):
+    """
+    Viterbi over the layers (point indexes per position): cheapest path
+    picking one point per layer. Returns (cost, pick index per layer).
+    """
+    cost = np.arange(len(layers[0])) * rank_penalty_km
+    back = []
+    for prev, layer in zip(layers, layers[1:]):
+        step = cost[:, None] + dist[np.ix_(prev, layer)]
+        arg = step.argmin(axis=0)
+        back.append(arg)
+        cost = step[arg, np.arange(len(layer))] + np.arange(len(layer)) * rank_penalty_km
+    pick = int(cost.argmin())
+    total = float(cost[pick])
+    picks = [pick]
+    for arg in reversed(back):
+        pick = int(arg[pick])
+        picks.append(pick)
+    return total, picks[::-1]
+
+
+def route_km(points):
+    """
+    Length (km) of the path visiting the points in order.
+    """
+    if len(points) < 2:
+        return 0.0
+    pts = np.asarray(points, dtype=float).reshape(-1, 2)
+    return float(haversine_km(pts[:-1, 0], pts[:-1, 1], pts[1:, 0], pts[1:, 1]).sum())
+
+
+def optimize_route(roles, options, rank_penalty_km, flexible=FLEXIBLE_ROLES):
+    """
+    Shortest day route.
+
+    `roles` are the slots in day order and `options[role]` the (lat, lng) of
+    its ranked candidates, best first (index 0 is the current pick). Roles in
+    `flexible` may swap positions; the others stay where they are.
+
+    Returns (order, picks): order[i] is the role whose place goes to
+    position i, picks[i] the index of the chosen candidate in options[order[i]].
+    """
+    index, points = {}, []
+    for role in roles:
+        for j, point in enumerate(options[role]):
+            index[role, j] = len(points)
+            points.append(point)
+    dist = distance_matrix(points)
+
+    flex_positions = [i for i, role in enumerate(roles) if role in flexible]
+    best = None
+    for perm in itertools.permutations([roles[i] for i in flex_positions]):
+        order = list(roles)
+        for position, role in zip(flex_positions, perm):
+            order[position] = role
+        layers = [[index[role, j] for j in range(len(options[role]))] for role in order]
+        cost, picks = _best_picks(layers, dist, rank_penalty_km)
+        if best is None or cost < best[0]:
+            best = (cost, order, picks)
+    return best[1], best[2]
@@ -1,10 +1,11 @@
 from rest_framework import serializers
-from .models import Itinerary, Day
+from .models import Itinerary, Day, PlanningJob
 
 class DaySerializer(serializers.ModelSerializer):
     class Meta:
         model = Day
-        fields = ['id', 'day_number', 'date', 'places_visited', 'generated_text']
+        fields = ['id', 'day_number', 'date', 'places_visited', 'generated_text', 'text_blocks']
+        read_only_fields = ['text_blocks']
 
 class ItinerarySerializer(serializers.ModelSerializer):
     # Remove o source errado e deixa o DRF usar o related_name 'days'
@@ -26,3 +27,23 @@ class ItinerarySerializer(serializers.ModelSerializer):
             'lng',
             'days',
         ]
+
+
+class PlanningJobSerializer(serializers.ModelSerializer):
+    itinerary_id = serializers.IntegerField(read_only=True)
+    is_finished = serializers.BooleanField(read_only=True)
+
+    class Meta:
+        model = PlanningJob
+        fields = [
+            'id',
+            'itinerary_id',
+            'status',
+            'stage',
+            'progress',
+            'error',
+            'is_finished',
+            'created_at',
+            'started_at',
+            'finished_at',
+        ]
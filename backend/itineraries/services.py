@@ -1,31 +1,56 @@
 # services.py
 
+"""
+Núcleo do planejamento. As funções que falam com Google / OpenAI são
+assíncronas (prefixo `a`: aplan_one_day_itinerary, agenerate_itinerary, ...)
+para que um worker ASGI segure muitos planejamentos esperando upstreams; os
+nomes síncronos de sempre continuam funcionando e delegam a elas via run_sync.
+"""
+
+import asyncio
 import base64
+import contextvars
 import json
 import logging
 import os
+import re
 import time
+from contextlib import contextmanager
 from datetime import datetime, timedelta
 from urllib.parse import quote
 
+import aiohttp
+import numpy as np
 import openai
 import requests
+from asgiref.sync import sync_to_async
 from django.conf import settings
 from django.contrib.auth.decorators import login_required
 from django.http import HttpResponse
 from django.shortcuts import get_object_or_404, redirect, render
 from django.template.loader import render_to_string
 from django.urls import reverse
+from django.utils import timezone
 from django.utils.formats import date_format
 from django.utils.translation import gettext as _
 from dotenv import load_dotenv
-from geopy.distance import geodesic
 from google.auth.transport.requests import AuthorizedSession, Request
 from google.oauth2 import service_account
 from weasyprint import HTML
 
+from .cache import ResponseCache, normalize_text
+from .clustering import day_areas
+from .concurrency import VisitedPlaces, gather_limited, run_sync
+from .gazetteer import lookup_destination, store_destination
+from .geo import within_radius
+from .http_client import UpstreamHTTPError, ahttp_get_json, get_async_session, http_get
+from .resilience import CircuitBreaker, CircuitOpenError, DeadlineExceeded, RetryPolicy, deadline
+from .stops import day_stop_records, itinerary_stop_records, save_day_stops, trip_place_names
 from .forms import ItineraryForm, ReviewForm
 from .models import Day, Itinerary
+from .place_index import lookup_places, store_places
+from .ranking import rank_candidates, target_price_level
+from .routing import optimize_route
 
 load_dotenv()
 openai.api_key = os.getenv('OPENAI_KEY')
@@ -37,6 +62,17 @@ MIN_PLACES_PER_DAY   = 3        # garante experiência mínima
 GPT_SUGGESTION_BATCH = 6        # GPT sempre devolve 6 opções
 HTTP_TIMEOUT         = 15       # segundos
 REQ_TIMEOUT          = settings.REQUEST_TIMEOUT
+PLACES_TEXTSEARCH_URL = "https://maps.googleapis.com/maps/api/place/textsearch/json"
+
+places_cache = ResponseCache("places",
+                             ttl=settings.PLACES_CACHE_TTL,
+                             max_entries=settings.PLACES_CACHE_MAX_ENTRIES)
+weather_cache = ResponseCache("weather",
+                              ttl=settings.WEATHER_CACHE_TTL,
+                              max_entries=settings.WEATHER_CACHE_MAX_ENTRIES)
+llm_cache = ResponseCache("openai",
+                          ttl=settings.OPENAI_CACHE_TTL,
+                          max_entries=settings.OPENAI_CACHE_MAX_ENTRIES)
 
 # ========================================================
 #                  Utility Functions
@@ -51,49 +87,233 @@ def _trip_days(itin: Itinerary) -> int:
     except Exception:
         return 1
 
+RETRYABLE_STATUS = {408, 429, 500, 502, 503, 504}
+
+
+def _is_retryable_http(exc) -> bool:
+    if isinstance(exc, (requests.ConnectionError, requests.Timeout,
+                        aiohttp.ClientConnectionError, asyncio.TimeoutError)):
+        return True
+    if isinstance(exc, requests.HTTPError) and exc.response is not None:
+        return exc.response.status_code in RETRYABLE_STATUS
+    if isinstance(exc, UpstreamHTTPError):
+        return exc.status in RETRYABLE_STATUS
+    return False
+
+
+def _is_retryable_openai(exc) -> bool:
+    if isinstance(exc, (openai.error.Timeout, openai.error.TryAgain,
+                        openai.error.APIConnectionError, openai.error.RateLimitError,
+                        openai.error.ServiceUnavailableError)):
+        return True
+    if isinstance(exc, openai.error.APIError):
+        return (exc.http_status or 500) >= 500
+    return False
+
+
+google_retry = RetryPolicy("google", _is_retryable_http)
+openai_retry = RetryPolicy("openai", _is_retryable_openai)
+
+# um circuit breaker por upstream; o de request_with_retry é escolhido pela URL
+breakers = {name: CircuitBreaker(name)
+            for name in ("places", "geocoding", "weather", "google", "openai")}
+UPSTREAMS = [
+    ("maps.googleapis.com/maps/api/place/", "places"),
+    ("maps.googleapis.com/maps/api/geocode/", "geocoding"),
+    ("weather.googleapis.com/", "weather"),
+]
+
+
+def _breaker_for(url):
+    for prefix, name in UPSTREAMS:
+        if prefix in url:
+            return breakers[name]
+    return breakers["google"]
+
+
 def request_with_retry(url, params=None, max_attempts=3, timeout=HTTP_TIMEOUT):
     """
-    HTTP GET resiliente com back-off exponencial.
+    HTTP GET resiliente: back-off com jitter, só para erros retentáveis,
+    dentro do prazo do request atual (ver resilience.RetryPolicy).
+    Com o circuit breaker do upstream aberto, falha na hora com CircuitOpenError.
     """
     params = params or {}
-    for attempt in range(1, max_attempts + 1):
-        try:
-            resp = requests.get(url, params=params, timeout=timeout)
-            resp.raise_for_status()
-            return resp
-        except requests.RequestException as e:
-            logger.warning(
-                f"[request_with_retry] {attempt}/{max_attempts} – {e} – URL={url}"
-            )
-            if attempt == max_attempts:
-                raise
-            time.sleep(2 ** attempt)
+
+    def attempt(timeout_cap):
+        resp = http_get(url, params=params,
+                        timeout=timeout if timeout_cap is None else max(0.5, min(timeout, timeout_cap)))
+        resp.raise_for_status()
+        return resp
+
+    return google_retry.call(attempt, max_attempts=max_attempts, description=f"URL={url}",
+                             breaker=_breaker_for(url))
+
+
+async def arequest_json(url, params=None, max_attempts=3, timeout=HTTP_TIMEOUT):
+    """
+    Versão assíncrona de request_with_retry (mesma política e circuit breaker),
+    devolvendo o JSON já decodificado.
+    """
+    async def attempt(timeout_cap):
+        return await ahttp_get_json(
+            url, params=params,
+            timeout=timeout if timeout_cap is None else max(0.5, min(timeout, timeout_cap)))
+
+    return await google_retry.acall(attempt, max_attempts=max_attempts, description=f"URL={url}",
+                                    breaker=_breaker_for(url))
+
+
+_llm_usage = contextvars.ContextVar("llm_usage", default=None)
 
 
-def openai_chatcompletion_with_retry(
+@contextmanager
+def track_llm_usage():
+    """
+    Count the OpenAI calls made inside the block (cache hits don't count) and
+    their prompt / completion tokens. Streamed calls carry no `usage`, so
+    their tokens are estimated at ~4 characters per token.
+    """
+    usage = {"calls": 0, "prompt_tokens": 0, "completion_tokens": 0, "estimated_calls": 0}
+    token = _llm_usage.set(usage)
+    try:
+        yield usage
+    finally:
+        _llm_usage.reset(token)
+
+
+def _estimate_tokens(text):
+    return max(1, len(text) // 4)
+
+
+def _record_llm_usage(messages, completion, reported=None):
+    usage = _llm_usage.get()
+    if usage is None:
+        return
+    usage["calls"] += 1
+    if reported:
+        usage["prompt_tokens"] += reported.get("prompt_tokens", 0)
+        usage["completion_tokens"] += reported.get("completion_tokens", 0)
+    else:
+        usage["estimated_calls"] += 1
+        usage["prompt_tokens"] += _estimate_tokens("".join(m["content"] for m in messages))
+        usage["completion_tokens"] += _estimate_tokens(completion or "")
+
+
+async def aopenai_chatcompletion_with_retry(
     messages,
     model="gpt-4o-mini",
     temperature=0,
     max_tokens=800,
     max_attempts=3,
+    use_cache=True,
     **extra,                       # ← NOVO!
 ):
-    for attempt in range(max_attempts):
+    """
+    ChatCompletion com retry. Com temperature=0 a resposta é determinística,
+    então fica no cache "openai" (chave = hash de modelo + mensagens +
+    parâmetros); passe use_cache=False onde a resposta precisa ser nova.
+    """
+    if use_cache and temperature == 0:
+        key = llm_cache.key(model, messages, temperature, max_tokens, extra)
+
+        async def fetch():
+            resp = await aopenai_chatcompletion_with_retry(
+                messages, model=model, temperature=temperature,
+                max_tokens=max_tokens, max_attempts=max_attempts,
+                use_cache=False, **extra,
+            )
+            return resp.to_dict_recursive()
+
+        payload = await llm_cache.aget_or_set(key, fetch)
+        return openai.openai_object.OpenAIObject.construct_from(payload)
+
+    async def attempt(timeout_cap):
+        kwargs = dict(extra)       # ← repassa response_format
+        if timeout_cap is not None:
+            kwargs["request_timeout"] = max(1, timeout_cap)
+        # usa o pool do aiohttp em vez de uma sessão nova por chamada
+        token = openai.aiosession.set(await get_async_session())
         try:
-            return openai.ChatCompletion.create(
+            return await openai.ChatCompletion.acreate(
                 model=model,
                 messages=messages,
                 max_tokens=max_tokens,
                 temperature=temperature,
-                **extra,           # ← repassa response_format
+                **kwargs,
             )
-        except openai.error.OpenAIError as e:
-            logger.warning(
-                f"[openai_chatcompletion_with_retry] {attempt+1}/{max_attempts} – {e}"
+        finally:
+            openai.aiosession.reset(token)
+
+    resp = await openai_retry.acall(attempt, max_attempts=max_attempts,
+                                    description=f"model={model}",
+                                    breaker=breakers["openai"])
+    _record_llm_usage(messages, resp.choices[0].message.get("content"), resp.get("usage"))
+    return resp
+
+
+openai_chatcompletion_with_retry = run_sync(aopenai_chatcompletion_with_retry)
+
+
+async def aopenai_chatcompletion_stream(
+    messages,
+    model="gpt-4o-mini",
+    temperature=0,
+    max_tokens=800,
+    max_attempts=3,
+    use_cache=True,
+    **extra,
+):
+    """
+    Modo streaming de aopenai_chatcompletion_with_retry: gerador assíncrono
+    que devolve o texto em pedaços conforme o modelo gera.
+
+    O retry só vale para abrir o stream; um erro no meio dele sobe (repetir
+    duplicaria o texto já entregue). Usa o mesmo cache "openai" do modo
+    normal: num hit o texto inteiro sai num pedaço só, e um stream completo
+    com temperature=0 é gravado para as próximas chamadas.
+    """
+    cache_key = None
+    if use_cache and temperature == 0:
+        cache_key = llm_cache.key(model, messages, temperature, max_tokens, extra)
+        cached = await sync_to_async(llm_cache.get)(cache_key)
+        if cached is not None:
+            yield cached["choices"][0]["message"]["content"]
+            return
+
+    async def attempt(timeout_cap):
+        kwargs = dict(extra)
+        if timeout_cap is not None:
+            kwargs["request_timeout"] = max(1, timeout_cap)
+        token = openai.aiosession.set(await get_async_session())
+        try:
+            return await openai.ChatCompletion.acreate(
+                model=model,
+                messages=messages,
+                max_tokens=max_tokens,
+                temperature=temperature,
+                stream=True,
+                **kwargs,
             )
-            if attempt == max_attempts - 1:
-                raise
-            time.sleep(2 ** attempt)
+        finally:
+            openai.aiosession.reset(token)
+
+    chunks = await openai_retry.acall(attempt, max_attempts=max_attempts,
+                                      description=f"model={model} (stream)",
+                                      breaker=breakers["openai"])
+    parts = []
+    async for chunk in chunks:
+        if not chunk.choices:
+            continue
+        delta = chunk.choices[0].delta.get("content")
+        if delta:
+            parts.append(delta)
+            yield delta
+
+    _record_llm_usage(messages, "".join(parts))
+    if cache_key:
+        payload = {"choices": [{"message": {"role": "assistant", "content": "".join(parts)}}]}
+        await sync_to_async(llm_cache.set)(cache_key, payload)
+
 
 def build_markers_json(itinerary):
     """
@@ -107,16 +327,8 @@ def build_markers_json(itinerary):
             "lat": float(itinerary.lat),
             "lng": float(itinerary.lng),
         })
-    # Add markers for places visited each day
-    for day in itinerary.days.all():
-        if day.places_visited:
-            try:
-                places = json.loads(day.places_visited)
-                if isinstance(places, list):
-                    all_markers.extend(places)
-            except Exception as e:
-                logger.warning(f"[build_markers_json] Failed to parse places_visited for day {day.id}: {e}")
-                continue
+    # Add markers for places visited each day (one query over DayStop)
+    all_markers.extend(itinerary_stop_records(itinerary))
     return json.dumps(all_markers, ensure_ascii=False)
 
 # ========================================================
@@ -212,22 +424,8 @@ def export_itinerary_pdf_view(request, pk):
         except (ValueError, TypeError) as e:
             logger.warning(f"[export_itinerary_pdf_view] Failed to convert lat/lng: {e}")
 
-    for day in itinerary.days.all():
-        if day.places_visited:
-            try:
-                day_places = json.loads(day.places_visited)
-                if isinstance(day_places, list):
-                    for place in day_places:
-                        try:
-                            markers_list.append({
-                                "name": place.get("name", ""),
-                                "lat": float(place["lat"]),
-                                "lng": float(place["lng"]),
-                            })
-                        except (KeyError, ValueError, TypeError) as e:
-                            logger.warning(f"[export_itinerary_pdf_view] Error extracting lat/lng: {e}")
-            except json.JSONDecodeError as e:
-                logger.warning(f"[export_itinerary_pdf_view] JSON decode error: {e}")
+    markers_list.extend({"name": p["name"], "lat": p["lat"], "lng": p["lng"]}
+                        for p in itinerary_stop_records(itinerary))
 
     # Build static map URL parameters
     markers_params = []
@@ -274,83 +472,188 @@ def export_itinerary_pdf_view(request, pk):
 
 
 
-def validate_google_place(candidate,
-                          dest_lat: float, dest_lng: float,
-                          *,
-                          max_km: float,
-                          min_rating: float,
-                          max_price: int | None) -> bool:
+async def aplaces_text_search(query, lat, lng, radius):
+    """
+    Places Text Search com cache persistente. A chave usa a consulta
+    normalizada, a localização arredondada (~100 m) e o raio, então a mesma
+    "category in destination" de usuários diferentes vira um hit.
+    Só respostas OK / ZERO_RESULTS são guardadas.
+    """
+    key = places_cache.key(
+        normalize_text(query),
+        round(float(lat), 3) if lat is not None else None,
+        round(float(lng), 3) if lng is not None else None,
+        int(radius),
+    )
+    params = {
+        "query": query,
+        "location": f"{lat},{lng}",
+        "radius": radius,
+        "key": settings.GOOGLEMAPS_KEY,
+    }
+    return await places_cache.aget_or_set(
+        key,
+        lambda: arequest_json(PLACES_TEXTSEARCH_URL, params=params),
+        cacheable=lambda data: data.get("status") in ("OK", "ZERO_RESULTS"),
+    )
+
+
+places_text_search = run_sync(aplaces_text_search)
+
+
+def _passes_place_filters(candidate, min_rating: float, max_price: int | None) -> bool:
     try:
-        loc   = candidate["geometry"]["location"]
-        dist  = geodesic((dest_lat, dest_lng), (loc["lat"], loc["lng"])).km
-        ok_d  = dist <= max_km
         ok_bs = candidate.get("business_status") == "OPERATIONAL"
         ok_rt = float(candidate.get("rating", 0)) >= min_rating
         ok_pr = True if max_price is None else \
                 int(candidate.get("price_level", max_price)) <= max_price
-        return ok_d and ok_bs and ok_rt and ok_pr
+        return ok_bs and ok_rt and ok_pr
     except Exception:
         return False
-    
-def search_best_place(category: str, dest: str,
-                      dest_lat: float, dest_lng: float,
-                      criteria: dict) -> tuple | None:
-    url = "https://maps.googleapis.com/maps/api/place/textsearch/json"
-    params = {
-        "query":  f"{category} in {dest}",
-        "location": f"{dest_lat},{dest_lng}",
-        "radius":   criteria["radius_m"],
-        "key":      settings.GOOGLEMAPS_KEY,
+
+
+def validate_google_places(candidates,
+                           dest_lat: float, dest_lng: float,
+                           *,
+                           max_km: float,
+                           min_rating: float,
+                           max_price: int | None) -> list:
+    """
+    Candidates of one text search that pass every filter, in their original
+    order. The distance check runs over the whole page at once (geo.within_radius).
+    """
+    points = []
+    for cand in candidates:
+        try:
+            loc = cand["geometry"]["location"]
+            points.append((float(loc["lat"]), float(loc["lng"])))
+        except (KeyError, TypeError, ValueError):
+            points.append((np.nan, np.nan))
+    try:
+        inside = within_radius(float(dest_lat), float(dest_lng), points, max_km)
+    except (TypeError, ValueError):       # destino sem coordenadas
+        return []
+    return [cand for cand, ok_d in zip(candidates, inside)
+            if ok_d and _passes_place_filters(cand, min_rating, max_price)]
+
+
+def validate_google_place(candidate,
+                          dest_lat: float, dest_lng: float,
+                          *,
+                          max_km: float,
+                          min_rating: float,
+                          max_price: int | None) -> bool:
+    return bool(validate_google_places([candidate], dest_lat, dest_lng, max_km=max_km,
+                                       min_rating=min_rating, max_price=max_price))
+
+def place_record(candidate) -> dict:
+    """
+    Campos de um resultado do Places que guardamos em places_visited.
+    """
+    loc = candidate["geometry"]["location"]
+    return {
+        "name": candidate["name"],
+        "lat": loc["lat"],
+        "lng": loc["lng"],
+        "place_id": candidate.get("place_id"),
+        "address": candidate.get("formatted_address"),
     }
-    data = request_with_retry(url, params=params).json()
+
+
+async def asearch_place_candidates(category: str, dest: str,
+                                   dest_lat: float, dest_lng: float,
+                                   criteria: dict) -> list:
+    """
+    Every result for "category in dest" that passes `criteria`, still in
+    Places order (see ranking.rank_candidates). The local place index is
+    asked first; Places is only called when it has fewer than
+    PLACE_INDEX_MIN_CANDIDATES, and its results feed the index.
+    """
+    def validate(candidates):
+        return validate_google_places(
+            candidates, dest_lat, dest_lng,
+            max_km     = criteria["radius_m"] / 1000,
+            min_rating = criteria["min_rating"],
+            max_price  = criteria["max_price"])
+
+    if settings.PLACE_INDEX_ENABLED and dest_lat is not None:
+        local = validate(await sync_to_async(lookup_places)(
+            category, dest_lat, dest_lng, criteria["radius_m"] / 1000))
+        if len(local) >= settings.PLACE_INDEX_MIN_CANDIDATES:
+            return local
+
+    try:
+        data = await aplaces_text_search(f"{category} in {dest}",
+                                  dest_lat, dest_lng, criteria["radius_m"])
+    except CircuitOpenError as e:
+        # Places fora: só o que estiver no cache é aproveitado
+        logger.warning(f"[search_best_place] {e} – '{category}' sem cache")
+        return []
     if data.get("status") != "OK":
+        return []
+
+    if settings.PLACE_INDEX_ENABLED:
+        await sync_to_async(store_places)(category, data["results"])
+    return validate(data["results"])
+
+
+async def asearch_best_place(category: str, dest: str,
+                             dest_lat: float, dest_lng: float,
+                             criteria: dict,
+                             anchors=None, target_price=None) -> dict | None:
+    """
+    Best ranked candidate (rating, reviews, distance to `anchors` – the
+    destination by default – and price fit), not just the first one.
+    """
+    valid = await asearch_place_candidates(category, dest, dest_lat, dest_lng, criteria)
+    if not valid:
         return None
+    if anchors is None and dest_lat is not None:
+        anchors = [(float(dest_lat), float(dest_lng))]
+    ranked = rank_candidates(valid, anchors or [], criteria["radius_m"] / 1000, target_price)
+    return place_record(ranked[0])
 
-    for cand in data["results"]:
-        if validate_google_place(
-                cand, dest_lat, dest_lng,
-                max_km     = criteria["radius_m"] / 1000,
-                min_rating = criteria["min_rating"],
-                max_price  = criteria["max_price"]):
-            loc = cand["geometry"]["location"]
-            return cand["name"], loc["lat"], loc["lng"]
-    return None
 
-def search_place_by_name(name: str, dest: str,
-                         dest_lat: float, dest_lng: float) -> tuple | None:
+search_best_place = run_sync(asearch_best_place)
+
+
+async def asearch_place_by_name(name: str, dest: str,
+                                dest_lat: float, dest_lng: float) -> dict | None:
     """
-    Procura por UM lugar específico (pelo nome) e devolve (name, lat, lng)
+    Procura por UM lugar específico (pelo nome) e devolve o place_record
     somente se for considerado válido por `validate_google_place`.
     """
-    url = "https://maps.googleapis.com/maps/api/place/textsearch/json"
-    params = {
-        "query": f"{name} in {dest}",
-        "location": f"{dest_lat},{dest_lng}",
-        "radius": 25000,
-        "key": settings.GOOGLEMAPS_KEY,
-    }
-    data = request_with_retry(url, params=params).json()
+    try:
+        data = await aplaces_text_search(f"{name} in {dest}", dest_lat, dest_lng, 25000)
+    except (CircuitOpenError, DeadlineExceeded, UpstreamHTTPError,
+            aiohttp.ClientError, asyncio.TimeoutError) as e:
+        # Places fora ou sem tempo: quem chamou mantém a lista original
+        logger.warning(f"[search_place_by_name] {e!r} – '{name}' não buscado")
+        return None
     if data.get("status") != "OK":
         return None
 
-    for cand in data["results"]:
-        # Aceita qualquer candidato que contenha o nome procurado
-        if name.lower() in cand["name"].lower() and \
-           validate_google_place(cand, dest_lat, dest_lng):
-            loc = cand["geometry"]["location"]
-            return cand["name"], loc["lat"], loc["lng"]
-    return None
+    # Aceita qualquer candidato que contenha o nome procurado
+    matches = [cand for cand in data["results"] if name.lower() in cand["name"].lower()]
+    valid = validate_google_places(matches, dest_lat, dest_lng,
+                                   max_km=25, min_rating=0.0, max_price=None)
+    return place_record(valid[0]) if valid else None
+
+
+search_place_by_name = run_sync(asearch_place_by_name)
 
 
 @login_required
 def replace_place_view(request):
     if request.method == 'POST':
         day_id = request.POST.get('day_id')
-        place_index = request.POST.get('place_index')
+        place_index = parse_place_index(request.POST.get('place_index'))
         observation = request.POST.get('observation', '')
 
         day = get_object_or_404(Day, pk=day_id, itinerary__user=request.user)
         itinerary = day.itinerary
+        if place_index is None:
+            return HttpResponse("Invalid place_index", status=400)
         replace_single_place_in_day(day, place_index, observation)
         return redirect(f"{reverse('dashboard')}?new_itinerary_id={itinerary.id}")
 
@@ -361,9 +664,10 @@ def replace_place_view(request):
 #           Core Planning Functions
 # ========================================================
 
-def generate_itinerary_overview(itinerary):
+async def agenerate_itinerary_overview(itinerary, on_text=None):
     """
     Generate a trip overview using GPT, with retries and logging on error.
+    The text is streamed; `await on_text(delta)` gets each piece as it arrives.
     """
     prompt = f"""
 You are an expert travel planner creating a comprehensive trip overview in markdown format. Generate a detailed, engaging overview using the following information:
@@ -404,18 +708,34 @@ Closing paragraph about creating unforgettable experiences.
 - Customize content based on the provided interests and extras
 - Make it feel personal and exciting"""
 
-    response = openai_chatcompletion_with_retry(
+    parts = []
+    async for delta in aopenai_chatcompletion_stream(
         messages=[{"role": "user", "content": prompt}],
         model="gpt-4o-mini",
         temperature=0,
         max_tokens=6000,
         max_attempts=3
-    )
-    return response.choices[0].message["content"]
+    ):
+        parts.append(delta)
+        if on_text:
+            await on_text(delta)
+    return "".join(parts)
+
+
+generate_itinerary_overview = run_sync(agenerate_itinerary_overview)
+
 
+def _category_inputs(itinerary, day_number):
+    """
+    Everything the category prompt depends on.
+    """
+    trip_days   = _trip_days(itinerary)
+    daily_budget = itinerary.budget // trip_days if itinerary.budget else ""
+    return (itinerary.destination, day_number, itinerary.interests or 'None',
+            daily_budget, itinerary.extras or 'None')
 
 
-def suggest_categories_gpt(itinerary, day_number):
+async def asuggest_categories_gpt(itinerary, day_number):
     """
     Retorna 6 dicts - {role, category}. NÃO devolve nome de lugar real.
     """
@@ -433,21 +753,21 @@ def suggest_categories_gpt(itinerary, day_number):
             "• Breakfast/Lunch/Dinner categories must be eateries."
         )
     }
-    trip_days   = _trip_days(itinerary)
-    daily_budget = itinerary.budget // trip_days if itinerary.budget else ""
+    destination, day_number, interests, daily_budget, extras = \
+        _category_inputs(itinerary, day_number)
 
     user_msg = {
         "role": "user",
         "content": (
-            f"Destination city: {itinerary.destination}\n"
+            f"Destination city: {destination}\n"
             f"Day number: {day_number}\n"
-            f"Key interests: {itinerary.interests or 'None'}\n"
+            f"Key interests: {interests}\n"
             f"Budget per day: ~${daily_budget}\n"        # <= usa cálculo local
-            f"Extras / constraints: {itinerary.extras or 'None'}\n"
+            f"Extras / constraints: {extras}\n"
             "Respond in JSON only."
         )
     }
-    resp = openai_chatcompletion_with_retry(
+    resp = await aopenai_chatcompletion_with_retry(
         [system_msg, user_msg],
         response_format={"type": "json_object"},
         max_tokens=280,
@@ -455,36 +775,106 @@ def suggest_categories_gpt(itinerary, day_number):
     return json.loads(resp.choices[0].message.content)["plan"]
 
 
+suggest_categories_gpt = run_sync(asuggest_categories_gpt)
 
 
+class CategoryPlanMemo:
+    """
+    Planos de categorias já conhecidos da viagem, por dia. O modo one-shot
+    o semeia com o plano da viagem inteira; um dia sem plano semeado (o
+    modelo o pulou, ou o modo per_day) pede o seu ao GPT.
+    """
 
+    def __init__(self):
+        self._plans = {}
 
+    async def get(self, itinerary, day_number):
+        plan = self._plans.get(day_number)
+        if plan is None:
+            plan = await asuggest_categories_gpt(itinerary, day_number)
+        return plan
 
+    def put(self, day_number, plan):
+        self._plans[day_number] = plan
 
 
-
-def generate_day_text_gpt(
-    itinerary,
-    day,
-    ordered_places,                    # list[dict] – c/ keys: name, lat, lng, role
-    budget,
-    travelers,
-    interests,
-    extras,
-    weather_info=None,
-):
+async def asuggest_trip_plan_gpt(itinerary):
     """
-    Cria a narrativa de um dia levando em conta os *slots* (breakfast … evening).
+    Modo one-shot: as categorias de TODOS os dias numa chamada só.
+    Retorna {day_number: [{role, category} ×6]}; dias que faltarem na
+    resposta ficam de fora (o chamador pede esses dias um a um).
+    """
+    trip_days = _trip_days(itinerary)
+    system_msg = {
+        "role": "system",
+        "content": (
+            "You are a travel-planner assistant.\n"
+            "Return ONLY valid JSON like:\n"
+            '{"days":[{"day":1,"plan":[{"role":"breakfast","category":"trendy coffee shop"}, …]}, …]}\n'
+            "Rules:\n"
+            f"• Exactly {trip_days} day objects, numbered from 1.\n"
+            "• Each plan has exactly six objects in this order: breakfast, morning, lunch, "
+            "afternoon, dinner, evening.\n"
+            "• category must be a short phrase describing *type* of place, "
+            "NOT a specific venue name.\n"
+            "• Breakfast/Lunch/Dinner categories must be eateries.\n"
+            "• Vary the categories from one day to the next."
+        )
+    }
+    daily_budget = itinerary.budget // trip_days if itinerary.budget else ""
+    user_msg = {
+        "role": "user",
+        "content": (
+            f"Destination city: {itinerary.destination}\n"
+            f"Number of days: {trip_days}\n"
+            f"Key interests: {itinerary.interests or 'None'}\n"
+            f"Budget per day: ~${daily_budget}\n"
+            f"Extras / constraints: {itinerary.extras or 'None'}\n"
+            "Respond in JSON only."
+        )
+    }
+    resp = await aopenai_chatcompletion_with_retry(
+        [system_msg, user_msg],
+        response_format={"type": "json_object"},
+        max_tokens=min(4000, 200 + 150 * trip_days),
+    )
+    plans = {}
+    for entry in json.loads(resp.choices[0].message.content).get("days", []):
+        try:
+            plan = entry["plan"]
+            if len(plan) == 6 and all("role" in p and "category" in p for p in plan):
+                plans[int(entry["day"])] = plan
+        except (KeyError, TypeError, ValueError):
+            continue
+    return plans
 
-    ordered_places já traz cada item com o campo `role` ∈
-    {breakfast, morning, lunch, afternoon, dinner, evening}.
-    O texto de cada bloco é gerado pelo GPT; os endereços são acrescentados
-    depois por verify_and_update_places().
+
+
+
+
+
+
+
+
+
+SLOT_LABELS = {
+    "breakfast": "🍳 **Breakfast**",
+    "morning": "🌅 **Morning Activity**",
+    "lunch": "🍽️ **Lunch**",
+    "afternoon": "☀️ **Afternoon Activity**",
+    "dinner": "🍷 **Dinner**",
+    "evening": "🌙 **Evening Entertainment**",
+}
+
+
+def _day_context(day, ordered_places, weather_info):
+    """
+    (title, weather line, slots block) of a day, shared by the per-day and
+    the batched narrative prompts.
     """
     # ---------- Cabeçalho ----------
     date_str   = date_format(day.date, format="DATE_FORMAT", use_l10n=True)
     title      = f"# Day {day.day_number} – {date_str}"
-    destination = itinerary.destination
 
     # weather pretty
     if weather_info.get("error"):
@@ -498,22 +888,36 @@ def generate_day_text_gpt(
         weather_str = f"🌤️ {cond}, {tmin}-{tmax} °C"
 
     # ---------- Slots ----------
-    slot_labels = {
-        "breakfast": "🍳 **Breakfast**",
-        "morning": "🌅 **Morning Activity**",
-        "lunch": "🍽️ **Lunch**",
-        "afternoon": "☀️ **Afternoon Activity**",
-        "dinner": "🍷 **Dinner**",
-        "evening": "🌙 **Evening Entertainment**",
-    }
-
     # Mantém ordem já presente em ordered_places
     slots_block = ""
     for itm in ordered_places:
         role      = itm["role"]
         place     = itm["name"]
-        label     = slot_labels.get(role, f"**{role.capitalize()}**")
+        label     = SLOT_LABELS.get(role, f"**{role.capitalize()}**")
         slots_block += f"{label}: {place}\n"
+    return title, weather_str, slots_block
+
+
+def _day_text_prompt(
+    itinerary,
+    day,
+    ordered_places,                    # list[dict] – c/ keys: name, lat, lng, role
+    budget,
+    travelers,
+    interests,
+    extras,
+    weather_info=None,
+):
+    """
+    Prompt da narrativa de um dia levando em conta os *slots* (breakfast … evening).
+
+    ordered_places já traz cada item com o campo `role` ∈
+    {breakfast, morning, lunch, afternoon, dinner, evening}.
+    O texto de cada bloco é gerado pelo GPT; os endereços são acrescentados
+    depois por verify_and_update_places().
+    """
+    title, weather_str, slots_block = _day_context(day, ordered_places, weather_info)
+    destination = itinerary.destination
 
     # ---------- Prompt ----------
     prompt = f"""
@@ -540,65 +944,228 @@ Create **six blocks** with proper markdown formatting. For **each block** delive
 **User preferences:** {extras}
 """
 
-    resp = openai_chatcompletion_with_retry(
+    return prompt
+
+
+async def astream_day_text_gpt(itinerary, day, ordered_places, budget, travelers,
+                               interests, extras, weather_info=None):
+    """
+    Narrativa do dia em streaming (pedaços de texto conforme o GPT gera).
+    """
+    prompt = _day_text_prompt(itinerary, day, ordered_places, budget, travelers,
+                              interests, extras, weather_info)
+    async for delta in aopenai_chatcompletion_stream(
         [{"role": "user", "content": prompt}],
         model="gpt-4o-mini",
         temperature=0,
         max_tokens=1800,
         max_attempts=3,
+    ):
+        yield delta
+
+
+async def agenerate_day_text_gpt(itinerary, day, ordered_places, budget, travelers,
+                                 interests, extras, weather_info=None):
+    """
+    Cria a narrativa de um dia (texto completo, ver _day_text_prompt).
+    """
+    parts = [delta async for delta in astream_day_text_gpt(
+        itinerary, day, ordered_places, budget, travelers, interests, extras, weather_info)]
+    return "".join(parts).strip()
+
+
+generate_day_text_gpt = run_sync(agenerate_day_text_gpt)
+
+
+DAY_MARKER = re.compile(r"^=== DAY (\d+) ===[ \t]*$", re.MULTILINE)
+
+
+async def agenerate_trip_text_gpt(itinerary, planned_days):
+    """
+    Modo one-shot: narrativa de vários dias numa chamada só.
+    `planned_days` é uma lista de (day, resolved_places, weather_info);
+    devolve {day_number: texto}. Cada dia vem precedido de uma linha
+    "=== DAY n ===" na resposta, que é usada para separar os textos.
+    """
+    destination = itinerary.destination
+    sections = []
+    for day, resolved, weather in planned_days:
+        title, weather_str, slots_block = _day_context(day, resolved, weather)
+        sections.append(
+            f"=== DAY {day.day_number} ===\n{title}\n"
+            f"**Weather forecast:** {weather_str}\n\n{slots_block}"
+        )
+    days_block = "\n".join(sections)
+
+    prompt = f"""
+**Destination:** {destination}
+
+Write the itinerary text for each of the {len(planned_days)} days below.
+Start every day with its marker line exactly as given (e.g. "=== DAY 1 ===")
+on a line of its own, followed by the day's title line.
+
+For each day create **six blocks** with proper markdown formatting. For **each block** deliver **exactly**:
+
+• **Time span** (HH:MM-HH:MM) in bold  
+• "📍" + place name **as provided** (do not translate or alter)  
+• One paragraph (≈90 words) explaining what to do / eat there.
+
+{days_block}
+
+**Formatting requirements:**
+- Use markdown formatting (bold, italics, lists where appropriate)
+- Keep the order of days and blocks unchanged
+- Breakfast/lunch/dinner paragraphs must describe food options
+- Friendly tone, English
+- End each day with a **💡 FINAL TIP** section about {destination}
+
+**User preferences:** {itinerary.extras}
+"""
+    resp = await aopenai_chatcompletion_with_retry(
+        [{"role": "user", "content": prompt}],
+        model="gpt-4o-mini",
+        temperature=0,
+        max_tokens=min(16000, 1800 * len(planned_days)),
+        max_attempts=3,
     )
-    return resp.choices[0].message.content.strip()
+    content = resp.choices[0].message.content
+    texts = {}
+    marks = list(DAY_MARKER.finditer(content))
+    for mark, following in zip(marks, marks[1:] + [None]):
+        end = following.start() if following else len(content)
+        texts[int(mark.group(1))] = content[mark.end():end].strip()
+    return texts
 
 
-def verify_and_update_places(day_text, lat, lng, destination):
+def _match_known_place(place_candidate, known_places):
     """
-    Find each "📍" line in the day_text, verify address via Google Places,
-    and append the verified address and a Maps link with proper markdown formatting.
+    Resolved record whose name matches the text of a "📍" line, if any.
+    Only records that already carry an address are useful here.
     """
-    location_str = f"{lat},{lng}" if lat and lng else "48.8566,2.3522"
-    lines = day_text.splitlines()
-    new_lines = []
+    wanted = normalize_text(place_candidate.strip("*_ "))
+    for place in known_places:
+        name = normalize_text(place.get("name"))
+        if place.get("address") and name and wanted and (name in wanted or wanted in name):
+            return place
+    return None
 
+
+def _place_candidate(line):
+    """
+    Place name written after "📍" on a line ("" when there is none).
+    """
+    return line.split("📍", 1)[-1].strip() if "📍" in line else ""
+
+
+def _annotate_places(lines, candidates):
+    new_lines = []
     for line in lines:
-        if "📍" in line:
-            place_candidate = line.split("📍", 1)[-1].strip()
-            if not place_candidate:
-                new_lines.append(line)
-                continue
+        place_candidate = _place_candidate(line)
+        if not place_candidate:
+            new_lines.append(line)
+            continue
 
-            place_data = search_place_in_google_maps(place_candidate, location=location_str, destination=destination)
-            if place_data is None:
-                new_lines.append(f"{line}")
-                new_lines.append(f"⚠️ **Warning:** Could not find '{place_candidate}' on Google Places.")
-                new_lines.append("")  # Empty line after warning
-            else:
-                address = place_data.get("formatted_address", "Address not found")
-                encoded = quote(address)
-                new_lines.append(f"{line}")
-                new_lines.append(f"📍 **Address:** {address}")
-                new_lines.append(f"🗺️ **[View on Google Maps](https://www.google.com/maps/search/?api=1&query={encoded})**")
-                new_lines.append("")  # Empty line for spacing
+        place_data = candidates.get(place_candidate)
+        if place_data is None:
+            new_lines.append(f"{line}")
+            new_lines.append(f"⚠️ **Warning:** Could not find '{place_candidate}' on Google Places.")
+            new_lines.append("")  # Empty line after warning
         else:
-            new_lines.append(line)
+            address = place_data.get("address") or "Address not found"
+            maps_url = f"https://www.google.com/maps/search/?api=1&query={quote(address)}"
+            if place_data.get("place_id"):
+                maps_url += f"&query_place_id={place_data['place_id']}"
+            new_lines.append(f"{line}")
+            new_lines.append(f"📍 **Address:** {address}")
+            new_lines.append(f"🗺️ **[View on Google Maps]({maps_url})**")
+            new_lines.append("")  # Empty line for spacing
+    return new_lines
+
+
+async def averify_and_update_places_stream(chunks, lat, lng, destination, known_places=None):
+    """
+    Find each "📍" line in a day text that arrives as a stream of chunks,
+    verify address via Google Places, and append the verified address and a
+    Maps link with proper markdown formatting.
+
+    Each line is looked up as soon as it is complete, while the model is
+    still writing the rest of the day. Places already resolved by the planner
+    (`known_places`, with address and place_id) are reused as-is.
+    """
+    location_str = f"{lat},{lng}" if lat and lng else "48.8566,2.3522"
+    known_places = known_places or []
+    semaphore = asyncio.Semaphore(settings.PLACES_SEARCH_CONCURRENCY)
+    lookups = {}
+
+    async def lookup(name):
+        async with semaphore:
+            place_data = await asearch_place_in_google_maps(name, location=location_str,
+                                                            destination=destination)
+        if place_data is None:
+            return None
+        return {
+            "address": place_data.get("formatted_address"),
+            "place_id": place_data.get("place_id"),
+        }
+
+    def start(line):
+        name = _place_candidate(line)
+        if name and name not in lookups:
+            known = _match_known_place(name, known_places)
+            lookups[name] = known if known is not None else asyncio.ensure_future(lookup(name))
+
+    parts, pending = [], ""
+    try:
+        async for chunk in chunks:
+            parts.append(chunk)
+            *complete, pending = (pending + chunk).split("\n")
+            for line in complete:
+                start(line)
+        start(pending)
+
+        candidates = {}
+        for name, found in lookups.items():
+            candidates[name] = await found if isinstance(found, asyncio.Future) else found
+    except BaseException:
+        for found in lookups.values():
+            if isinstance(found, asyncio.Future):
+                found.cancel()
+        raise
 
-    return "\n".join(new_lines)
+    day_text = "".join(parts).strip()
+    return "\n".join(_annotate_places(day_text.splitlines(), candidates))
 
 
-def search_place_in_google_maps(place_name, location="48.8566,2.3522", destination=None, radius=5000):
+async def _one_chunk(text):
+    yield text
+
+
+async def _forward_text(chunks, on_text):
+    async for delta in chunks:
+        if on_text:
+            await on_text(delta)
+        yield delta
+
+
+async def averify_and_update_places(day_text, lat, lng, destination, known_places=None):
+    """
+    Same as averify_and_update_places_stream for a day text that is already complete.
+    """
+    return await averify_and_update_places_stream(_one_chunk(day_text), lat, lng,
+                                                  destination, known_places)
+
+
+verify_and_update_places = run_sync(averify_and_update_places)
+
+
+async def asearch_place_in_google_maps(place_name, location="48.8566,2.3522", destination=None, radius=5000):
     """
     Search for a place using Google Places Text Search API.
     """
-    base_url = "https://maps.googleapis.com/maps/api/place/textsearch/json"
     query = f"{place_name}, {destination}" if destination else place_name
-    params = {
-        "query": query,
-        "location": location,
-        "radius": radius,
-        "key": settings.GOOGLEMAPS_KEY,
-    }
     try:
-        response = request_with_retry(base_url, params=params, max_attempts=3)
-        data = response.json()
+        lat, lng = (c.strip() for c in location.split(","))
+        data = await aplaces_text_search(query, lat, lng, radius)
         if data["status"] == "OK" and data["results"]:
             return data["results"][0]
         else:
@@ -609,68 +1176,434 @@ def search_place_in_google_maps(place_name, location="48.8566,2.3522", destinati
         return None
 
 
-def plan_one_day_itinerary(itinerary, day, already_visited=None):
-    already_visited = {n.lower() for n in (already_visited or [])}
-
-    # três níveis de tolerância crescentes
-    criteria_levels = [
-        {"radius_m": 25_000, "min_rating": 3.8, "max_price": 3},   # nível 1 (estrito)
-        {"radius_m": 35_000, "min_rating": 3.5, "max_price": 4},   # nível 2
-        {"radius_m": 50_000, "min_rating": 0.0, "max_price": None} # nível 3 (liberal)
-    ]
-
-    for criteria in criteria_levels:                  # tenta 3 níveis
-        plan     = suggest_categories_gpt(itinerary, day.day_number)
-        resolved = [];  missing = []
-
-        for item in plan:
-            role = item["role"];  cat = item["category"]
-            res  = search_best_place(cat, itinerary.destination,
-                                     itinerary.lat, itinerary.lng,
-                                     criteria)
-            if res and res[0].lower() not in already_visited:
-                name, lat, lng = res
-                resolved.append({"role":role,"place":name,"name":name,
-                                 "lat":lat,"lng":lng})
-                already_visited.add(name.lower())
-            else:
-                missing.append(role)
+search_place_in_google_maps = run_sync(asearch_place_in_google_maps)
+
+
+# três níveis de tolerância crescentes
+CRITERIA_LEVELS = [
+    {"radius_m": 25_000, "min_rating": 3.8, "max_price": 3},   # nível 1 (estrito)
+    {"radius_m": 35_000, "min_rating": 3.5, "max_price": 4},   # nível 2
+    {"radius_m": 50_000, "min_rating": 0.0, "max_price": None} # nível 3 (liberal)
+]
+
+
+def _criteria_levels(area):
+    """
+    CRITERIA_LEVELS, preceded by a tight level around the day's area
+    (lat, lng, radius_km) when the trip was split in areas.
+    """
+    if area is None:
+        return CRITERIA_LEVELS
+    lat, lng, radius_km = area
+    return [{**CRITERIA_LEVELS[0], "radius_m": int(radius_km * 1000), "center": (lat, lng)},
+            *CRITERIA_LEVELS]
+
+
+async def _aresolve_day_places(itinerary, plan, already_visited, area=None):
+    """
+    Find a real place for every slot of `plan`, relaxing CRITERIA_LEVELS
+    (first inside the day's `area`, if any; see _aday_areas).
+    Each slot takes its best ranked candidate (ranking.py), measured against
+    the stops already picked for the day; the day is then put in route order
+    (see _optimize_day_route). Returns (resolved places in plan
+    order, [], alternates) or (None, missing roles, {}); on failure the
+    names claimed for this day are released. `alternates` maps each role
+    to its next ALTERNATES_PER_SLOT ranked places (place_record).
+    """
+    if itinerary.lat is None or itinerary.lng is None:
+        # geocoding falhou: nenhum candidato passaria no filtro de distância
+        return None, [item["role"] for item in plan], {}
+
+    by_role  = {}
+    alternates = {}
+    pending  = list(plan)
+    target_price = target_price_level(itinerary.budget, itinerary.travelers,
+                                      _trip_days(itinerary))
+    destination = (float(itinerary.lat), float(itinerary.lng))
+
+    for criteria in _criteria_levels(area):           # tenta 3 níveis (+ a área do dia)
+        center = criteria.get("center", destination)
+        # as buscas de todos os slots pendentes saem em paralelo; os níveis
+        # seguintes só refazem a busca dos papéis ainda não resolvidos
+        results = await gather_limited(
+            lambda item: asearch_place_candidates(item["category"], itinerary.destination,
+                                                  center[0], center[1],
+                                                  criteria),
+            pending,
+            limit=settings.PLACES_SEARCH_CONCURRENCY,
+        )
 
-        if not missing:                          # achou os 6!
+        still_missing = []
+        for item, candidates in zip(pending, results):
+            # a escolha é sequencial: cada slot fica perto dos já escolhidos
+            anchors = [(p["lat"], p["lng"]) for p in by_role.values()] or [center]
+            ranked = rank_candidates(candidates, anchors,
+                                     criteria["radius_m"] / 1000, target_price)
+            pick = next((i for i, cand in enumerate(ranked)
+                         if already_visited.claim(cand["name"])), None)
+            if pick is None:
+                still_missing.append(item)
+                continue
+            res = place_record(ranked[pick])
+            by_role[item["role"]] = {"role":item["role"],"place":res["name"],**res}
+            alternates[item["role"]] = [
+                place_record(cand) for cand in ranked[pick + 1:]
+                if cand["name"] not in already_visited
+            ][:settings.ALTERNATES_PER_SLOT]
+
+        pending = still_missing
+        if not pending:                          # achou os 6!
             break                                # sai do for-criteria
 
+    missing = [item["role"] for item in pending]
     if missing:                                  # mesmo no nível 3 falhou
-        msg = ("Could not find valid places for roles: "
-               + ", ".join(missing))
-        day.generated_text = msg
-        day.save(update_fields=["generated_text"])
-        return msg, []
+        # libera os lugares já reservados para os outros dias
+        for p in by_role.values():
+            already_visited.release(p["name"])
+        return None, missing, {}
+
+    # ordem do GPT, depois ajustada pelo menor caminho do dia
+    resolved = [by_role[item["role"]] for item in plan]
+    resolved, alternates = _optimize_day_route(resolved, alternates, already_visited)
+    return resolved, [], alternates
+
+
+def _bare_record(place):
+    return {k: v for k, v in place.items() if k not in ("role", "place")}
+
+
+def _optimize_day_route(resolved, alternates, already_visited):
+    """
+    Reorder the flexible slots of a day and swap in ranked alternates when
+    that shortens the route (routing.optimize_route). A swapped-in place is
+    claimed and the one it replaces is released and goes back to the front
+    of the pool; if the claim fails (another day took it) the slot keeps its place.
+    """
+    roles = [p["role"] for p in resolved]
+    if len(set(roles)) != len(roles):
+        return resolved, alternates
+    size = settings.ROUTE_CANDIDATES_PER_SLOT
+    options = {p["role"]: [_bare_record(p)] + alternates.get(p["role"], [])[:size - 1]
+               for p in resolved}
+    order, picks = optimize_route(
+        roles,
+        {role: [(c["lat"], c["lng"]) for c in cands] for role, cands in options.items()},
+        rank_penalty_km=settings.ROUTE_RANK_PENALTY_KM,
+    )
+
+    routed, pools = [], {}
+    for position_role, role, pick in zip(roles, order, picks):
+        current = options[role][0]
+        chosen = options[role][pick]
+        if pick and not already_visited.claim(chosen["name"]):
+            chosen = current
+        elif pick:
+            already_visited.release(current["name"])
+        routed.append({"role": position_role, "place": chosen["name"], **chosen})
+        pools[position_role] = [c for c in [current] + alternates.get(role, [])
+                                if c["name"] != chosen["name"]][:settings.ALTERNATES_PER_SLOT]
+    return routed, pools
+
+
+async def _afail_day(day, missing):
+    msg = ("Could not find valid places for roles: "
+           + ", ".join(missing))
+    day.generated_text = msg
+    await day.asave(update_fields=["generated_text"])
+    return msg, []
+
+
+async def _afinish_day(itinerary, day, resolved, chunks, alternates=None):
+    """
+    Verify the day text (a stream of chunks) and save it with its places,
+    its per-slot blocks and the alternates pool of each slot.
+    """
+    verified = await averify_and_update_places_stream(
+                   chunks, itinerary.lat, itinerary.lng,
+                   itinerary.destination, known_places=resolved)
+
+    day.places_visited = json.dumps(resolved, ensure_ascii=False)
+    day.generated_text = verified
+    day.text_blocks = _split_day_blocks(verified, resolved)
+    day.alternates = alternates or {}
+    await day.asave(update_fields=["places_visited","generated_text","text_blocks","alternates"])
+    await sync_to_async(save_day_stops)(day, resolved)
+    return verified, [p["name"] for p in resolved]
+
+
+async def aplan_one_day_itinerary(itinerary, day, already_visited=None, on_text=None,
+                                  plan_memo=None, area=None):
+    # aceita uma lista de nomes ou um VisitedPlaces compartilhado entre dias
+    if not isinstance(already_visited, VisitedPlaces):
+        already_visited = VisitedPlaces(already_visited or [])
+
+    # categorias são pedidas uma vez só, para todos os níveis de critério
+    # (ou vêm prontas do plano one-shot, via memo)
+    plan_memo = plan_memo or CategoryPlanMemo()
+    plan = await plan_memo.get(itinerary, day.day_number)
+    resolved, missing, alternates = await _aresolve_day_places(itinerary, plan,
+                                                               already_visited, area)
+    if missing:
+        return await _afail_day(day, missing)
 
     # --- clima + narrativa exatamente como antes ---
-    weather  = get_google_weather_forecast(day.date,
-                                           itinerary.lat, itinerary.lng)
-    raw_txt  = generate_day_text_gpt(
+    weather  = await aget_google_weather_forecast(day.date,
+                                                  itinerary.lat, itinerary.lng)
+    # a narrativa chega em streaming (repassada a `on_text`) e cada "📍"
+    # já é verificado enquanto o resto do dia ainda está sendo escrito
+    chunks   = astream_day_text_gpt(
                    itinerary, day, resolved,
                    budget=str(itinerary.budget),
                    travelers=itinerary.travelers,
                    interests=itinerary.interests,
                    extras=itinerary.extras,
                    weather_info=weather)
-    verified = verify_and_update_places(
-                   raw_txt, itinerary.lat, itinerary.lng,
-                   itinerary.destination)
+    return await _afinish_day(itinerary, day, resolved, _forward_text(chunks, on_text),
+                              alternates)
 
-    day.places_visited = json.dumps(resolved, ensure_ascii=False)
-    day.generated_text = verified
-    day.save(update_fields=["places_visited","generated_text"])
-    return verified, [p["name"] for p in resolved]
+
+plan_one_day_itinerary = run_sync(aplan_one_day_itinerary)
+
+
+async def _no_progress(stage, percent):
+    pass
+
+
+async def _no_ready(kind, obj):
+    pass
 
 
-def get_google_weather_forecast(target_date, lat, lng):
+async def agenerate_itinerary(itinerary, progress=None, on_ready=None, mode=None):
     """
-    Call Google Weather API v1 forecast/days:lookup and return forecast for the target date.
+    Run the whole planning pipeline for a saved itinerary: geocoding,
+    overview and one Day per date. `await progress(stage, percent)` is
+    called between stages so a PlanningJob can report where it is, and
+    `await on_ready(kind, obj)` as soon as a result is ready — kind
+    "overview" with the itinerary and "day" with each Day as it finishes,
+    in whatever order they complete (the overview is written concurrently
+    with the days) — so it can be streamed to the client. While the texts are being written,
+    "overview_text" (delta) and "day_text" ((day, delta)) carry the tokens.
+
+    `mode` (default settings.PLANNING_MODE) is "per_day" — categories and
+    narrative asked per day — or "one_shot" — one category call for the
+    whole trip and batched narratives (see _aplan_days_one_shot).
+
+    All upstream calls share a PLANNING_DEADLINE budget; once it is spent,
+    retries stop and the remaining calls fail fast with DeadlineExceeded.
+    """
+    with deadline(settings.PLANNING_DEADLINE):
+        return await _agenerate_itinerary(itinerary, progress or _no_progress,
+                                          on_ready or _no_ready,
+                                          mode or settings.PLANNING_MODE)
+
+
+async def _agenerate_itinerary(itinerary, report, on_ready, mode):
+    total_days = _trip_days(itinerary)
+
+    await report("geocoding", 5)
+    lat, lng = await aget_cordinates_google_geocoding(itinerary.destination)
+    itinerary.lat = lat
+    itinerary.lng = lng
+
+    # o overview não influencia os dias: é escrito em paralelo com o
+    # planejamento e só é persistido quando os dois terminam
+    await report("overview", 10)
+    overview_task = asyncio.ensure_future(_aoverview(itinerary, on_ready))
+    try:
+        await _aplan_days(itinerary, total_days, report, on_ready, mode)
+        itinerary.generated_text = await overview_task
+    except BaseException:
+        overview_task.cancel()
+        raise
+    await itinerary.asave()
+
+    await report("done", 100)
+    return itinerary
+
+
+async def _aoverview(itinerary, on_ready):
+    try:
+        overview = await agenerate_itinerary_overview(
+            itinerary, on_text=lambda delta: on_ready("overview_text", delta))
+    except Exception as e:
+        # o overview é opcional: breaker aberto, prazo estourado ou OpenAI
+        # fora não derrubam os dias já planejados
+        logger.warning(f"[generate_itinerary] Overview ignorado: {e!r}")
+        overview = ""
+    itinerary.generated_text = overview
+    await on_ready("overview", itinerary)
+    return overview
+
+
+def _area_queries(itinerary):
+    interests = [i.strip() for i in (itinerary.interests or "").split(",") if i.strip()]
+    return ["tourist attractions"] + interests[:settings.DAY_AREAS_MAX_INTERESTS]
+
+
+async def _aday_areas(itinerary, days):
+    """
+    {day_number: (lat, lng, radius_km)}: one area of the city per day.
+
+    A pool of candidates ("tourist attractions" + the trip interests) is
+    fetched once for the whole trip and split with k-means
+    (clustering.day_areas). Empty — days use the destination as before —
+    for single-day trips, when disabled or when the pool is too small.
     """
+    if not settings.DAY_AREAS_ENABLED or days < 2 or itinerary.lat is None:
+        return {}
+    criteria = CRITERIA_LEVELS[0]
     try:
+        pages = await gather_limited(
+            lambda query: asearch_place_candidates(query, itinerary.destination,
+                                                   itinerary.lat, itinerary.lng,
+                                                   {**criteria, "min_rating": 0.0}),
+            _area_queries(itinerary),
+            limit=settings.PLACES_SEARCH_CONCURRENCY,
+        )
+    except Exception as e:
+        logger.warning(f"[day_areas] Pool de candidatos indisponível: {e}")
+        return {}
+
+    seen, points = set(), []
+    for cand in (c for page in pages for c in page):
+        key = cand.get("place_id") or cand["name"]
+        if key not in seen:
+            seen.add(key)
+            loc = cand["geometry"]["location"]
+            points.append((float(loc["lat"]), float(loc["lng"])))
+
+    areas = day_areas(points, days,
+                      min_km=settings.DAY_AREA_MIN_RADIUS_KM,
+                      max_km=settings.DAY_AREA_MAX_RADIUS_KM)
+    if not areas:
+        return {}
+    # com menos grupos que dias (grupo vazio), as áreas se repetem
+    return {n: areas[(n - 1) % len(areas)] for n in range(1, days + 1)}
+
+
+async def _aplan_days(itinerary, total_days, report, on_ready, mode):
+    # um job reexecutado (worker caiu no meio) recomeça do zero
+    await Day.objects.filter(itinerary=itinerary).adelete()
+
+    days = []
+    current_date = itinerary.start_date
+    day_number = 1
+    while current_date <= itinerary.end_date:
+        days.append(await Day.objects.acreate(
+            itinerary=itinerary,
+            day_number=day_number,
+            date=current_date
+        ))
+        current_date += timedelta(days=1)
+        day_number += 1
+
+    # um bairro por dia: as buscas de cada dia começam pela sua área
+    await report("areas", 15)
+    areas = await _aday_areas(itinerary, len(days))
+
+    # os dias são planejados em paralelo; o conjunto compartilhado evita
+    # que dois dias escolham o mesmo lugar
+    visited = VisitedPlaces()
+    plan_memo = CategoryPlanMemo()
+    finished = []
+
+    async def day_done(index, final_places):
+        finished.append(index)
+        await report(f"day {len(finished)}/{total_days}", 20 + 75 * len(finished) // total_days)
+
+    await report(f"day 0/{total_days}", 20)
+    if mode == "one_shot":
+        await _aplan_days_one_shot(itinerary, days, visited, plan_memo, on_ready, day_done,
+                                   areas)
+        return
+
+    async def plan_day(day):
+        day_text, final_places = await aplan_one_day_itinerary(
+            itinerary, day, visited,
+            on_text=lambda delta: on_ready("day_text", (day, delta)),
+            plan_memo=plan_memo,
+            area=areas.get(day.day_number))
+        day.generated_text = day_text
+        await day.asave()
+        await on_ready("day", day)
+        return final_places
+
+    await gather_limited(plan_day, days,
+                         limit=settings.PLANNING_DAY_CONCURRENCY,
+                         on_result=day_done)
+
+
+generate_itinerary = run_sync(agenerate_itinerary)
+
+
+async def _aplan_days_one_shot(itinerary, days, visited, plan_memo, on_ready, day_done,
+                               areas=None):
+    """
+    Modo one-shot: uma chamada de categorias para a viagem inteira, busca dos
+    lugares de todos os dias e narrativas em lotes de ONE_SHOT_DAYS_PER_CALL
+    dias por chamada, em vez de 2 chamadas ao GPT por dia.
+    """
+    for day_number, plan in (await asuggest_trip_plan_gpt(itinerary)).items():
+        plan_memo.put(day_number, plan)
+
+    async def resolve(day):
+        # dia que o modelo pulou: o memo pede só ele
+        plan = await plan_memo.get(itinerary, day.day_number)
+        return await _aresolve_day_places(itinerary, plan, visited,
+                                          (areas or {}).get(day.day_number))
+
+    resolutions = await gather_limited(resolve, days, limit=settings.PLANNING_DAY_CONCURRENCY)
+
+    planned = []
+    for index, (day, (resolved, missing, alternates)) in enumerate(zip(days, resolutions)):
+        if missing:
+            await _afail_day(day, missing)
+            await on_ready("day", day)
+            await day_done(index, [])
+        else:
+            weather = await aget_google_weather_forecast(day.date, itinerary.lat, itinerary.lng)
+            planned.append((index, day, resolved, weather, alternates))
+
+    size = settings.ONE_SHOT_DAYS_PER_CALL
+    batches = [planned[i:i + size] for i in range(0, len(planned), size)]
+
+    async def write_batch(batch):
+        texts = await agenerate_trip_text_gpt(
+            itinerary, [(day, resolved, weather) for _, day, resolved, weather, _ in batch])
+
+        async def finish(entry):
+            index, day, resolved, weather, alternates = entry
+            text = texts.get(day.day_number)
+            if text:
+                chunks = _one_chunk(text)
+            else:
+                logger.warning(f"[one_shot] Dia {day.day_number} ausente na resposta – gerando sozinho")
+                chunks = astream_day_text_gpt(
+                    itinerary, day, resolved,
+                    budget=str(itinerary.budget),
+                    travelers=itinerary.travelers,
+                    interests=itinerary.interests,
+                    extras=itinerary.extras,
+                    weather_info=weather)
+            _, final_places = await _afinish_day(itinerary, day, resolved, chunks, alternates)
+            await on_ready("day", day)
+            await day_done(index, final_places)
+
+        await gather_limited(finish, batch, limit=settings.PLACES_SEARCH_CONCURRENCY)
+
+    await gather_limited(write_batch, batches, limit=settings.PLANNING_DAY_CONCURRENCY)
+
+
+async def afetch_weather_forecast_days(lat, lng):
+    """
+    Full 10-day forecast for a location, cached by coordinates rounded to
+    ~1 km and by the fetch date, so every day of a trip (and every
+    replacement) is served from a single Weather API call.
+    """
+    lat, lng = round(float(lat), 2), round(float(lng), 2)
+    key = weather_cache.key(lat, lng, timezone.localdate().isoformat())
+
+    async def fetch():
         url = "https://weather.googleapis.com/v1/forecast/days:lookup"
         params = {
             "location.latitude": lat,
@@ -680,12 +1613,23 @@ def get_google_weather_forecast(target_date, lat, lng):
             "unitsSystem": "METRIC",
             "key": settings.GOOGLEMAPS_KEY,
         }
+        data = await arequest_json(url, params=params, max_attempts=3)
+        logger.debug(f"[fetch_weather_forecast_days] Response data: {data}")
+        return {"forecastDays": data.get("forecastDays", [])}
 
-        response = request_with_retry(url, params=params, max_attempts=3)
-        data = response.json()
-        logger.debug(f"[get_google_weather_forecast] Response data: {data}")
+    data = await weather_cache.aget_or_set(key, fetch, cacheable=lambda d: bool(d["forecastDays"]))
+    return data["forecastDays"]
 
-        for day in data.get("forecastDays", []):
+
+fetch_weather_forecast_days = run_sync(afetch_weather_forecast_days)
+
+
+async def aget_google_weather_forecast(target_date, lat, lng):
+    """
+    Call Google Weather API v1 forecast/days:lookup and return forecast for the target date.
+    """
+    try:
+        for day in await afetch_weather_forecast_days(lat, lng):
             info = day.get("displayDate", {})
             d = datetime(year=int(info.get("year",0)), month=int(info.get("month",0)), day=int(info.get("day",0))).date()
             if d == target_date:
@@ -705,79 +1649,262 @@ def get_google_weather_forecast(target_date, lat, lng):
         return {"error": "Error fetching weather forecast"}
 
 
-def get_cordinates_google_geocoding(address):
+get_google_weather_forecast = run_sync(aget_google_weather_forecast)
+
+
+async def aget_cordinates_google_geocoding(address):
     """
     Use Google Geocoding API to get lat/lng for an address.
+    Known destinations are served from the gazetteer without calling the API.
     """
+    if settings.GAZETTEER_ENABLED:
+        known = await sync_to_async(lookup_destination)(address)
+        if known:
+            return known[0], known[1]
+
     base_url = "https://maps.googleapis.com/maps/api/geocode/json"
     params = {'address': address, 'key': settings.GOOGLEMAPS_KEY}
     try:
-        response = request_with_retry(base_url, params=params, max_attempts=3)
-        data = response.json()
+        data = await arequest_json(base_url, params=params, max_attempts=3)
         if data['status'] == 'OK':
-            loc = data['results'][0]['geometry']['location']
+            result = data['results'][0]
+            loc = result['geometry']['location']
+            if settings.GAZETTEER_ENABLED:
+                await sync_to_async(store_destination)(
+                    address, loc['lat'], loc['lng'], result.get('formatted_address'))
             return loc['lat'], loc['lng']
     except Exception as e:
         logger.error(f"[get_cordinates_google_geocoding] Error geocoding address: {e}")
     return None, None
 
 
-def replace_single_place_in_day(day, place_index, user_observation):
+get_cordinates_google_geocoding = run_sync(aget_cordinates_google_geocoding)
+
+
+def parse_place_index(value):
+    """
+    Index of the stop to replace, as sent by a client: a non-negative int,
+    or None when it is missing or invalid (the views answer 400).
+    """
+    if isinstance(value, bool):
+        return None
+    try:
+        index = int(value)
+    except (TypeError, ValueError):
+        return None
+    return index if index >= 0 else None
+
+
+async def areplace_single_place_in_day(day, place_index, user_observation):
     """
     Replace one place in a day's itinerary based on user feedback.
     """
-    itinerary = day.itinerary
-    all_days = itinerary.days.all().order_by('day_number')
-    visited = set()
-
-    # Gather all other visited places
-    for d in all_days:
-        if d.places_visited:
-            try:
-                arr = json.loads(d.places_visited)
-                for i, pl in enumerate(arr):
-                    if d.id == day.id and i == int(place_index):
-                        continue
-                    visited.add(pl["name"].lower())
-            except Exception as e:
-                logger.warning(f"[replace_single_place_in_day] Error parsing places_visited for day {d.id}: {e}")
+    with deadline(settings.REPLACE_PLACE_DEADLINE):
+        return await _areplace_single_place_in_day(day, place_index, user_observation)
 
-    try:
-        current = json.loads(day.places_visited)
-    except:
-        current = []
-    if int(place_index) < len(current):
-        current.pop(int(place_index))
 
-    new_place = suggest_one_new_place_gpt(itinerary, day, visited, user_observation)
+def _next_alternate(day, role, visited):
+    """
+    Pop the best alternate of `role` not used anywhere in the trip yet.
+    """
+    pool = (day.alternates or {}).get(role) or []
+    while pool:
+        candidate = pool.pop(0)
+        if candidate["name"].lower() not in visited:
+            return candidate
+    return None
 
-    if new_place:
-        res = search_place_by_name(
-            new_place,
-            itinerary.destination,
-            itinerary.lat, itinerary.lng
-        )
-        if res:
-            name, lat, lng = res
-            current.insert(
-                int(place_index),
-                {"name": name, "lat": lat, "lng": lng}
-            )
+
+TIME_SPAN = re.compile(r"\d{1,2}[:h]\d{2}")
+ANNOTATION_PREFIXES = ("📍 **Address:**", "🗺️ **[View on Google Maps]", "⚠️ **Warning:**")
+
+
+def _is_annotation(line):
+    return line.strip().startswith(ANNOTATION_PREFIXES)
+
+
+def _is_block_heading(line):
+    """
+    Time span / slot label lines that open a block ("**08:00-09:00**", "🍳 **Breakfast**").
+    """
+    text = line.strip()
+    if not text or len(text) > 80 or text.startswith("# "):     # "# Day N" é o título
+        return False
+    labels = tuple(label.split()[0] for label in SLOT_LABELS.values())
+    return text.startswith("#") or text.startswith(labels) or bool(TIME_SPAN.search(text))
+
+
+def _split_day_blocks(text, places):
+    """
+    Split a day text into addressable blocks, in order:
+    [{"key": "header"}, {"key": <role>} per place, {"key": "final_tip"}],
+    each with its "text". None when the places cannot be told apart.
+    """
+    lines = (text or "").splitlines()
+    pins, cursor = [], 0
+    for place in places:
+        wanted = normalize_text(place["name"])
+        for i in range(cursor, len(lines)):
+            found = normalize_text(_place_candidate(lines[i]).strip("*_ "))
+            if found and not _is_annotation(lines[i]) and (wanted in found or found in wanted):
+                pins.append(i)
+                cursor = i + 1
+                break
         else:
-            logger.warning(f"[replace_single_place_in_day] '{new_place}' not found/validated – keeping original list")
+            return None
+    if not pins:
+        return None
+
+    def block_start(k):
+        floor = pins[k - 1] + 1 if k else 0
+        start = pins[k]
+        i = start - 1
+        while i >= floor and (not lines[i].strip() or _is_block_heading(lines[i])):
+            if lines[i].strip():
+                start = i
+            i -= 1
+        return start
+
+    starts = [block_start(k) for k in range(len(pins))]
+    tip = next((i for i in range(pins[-1] + 1, len(lines))
+                if "final tip" in lines[i].lower() and len(lines[i]) <= 80), len(lines))
+    bounds = [0] + starts + [tip, len(lines)]
+    keys = ["header"] + [p.get("role") or f"place_{k}" for k, p in enumerate(places)] + ["final_tip"]
+    return [{"key": key, "text": "\n".join(lines[a:b]).strip()}
+            for key, a, b in zip(keys, bounds, bounds[1:])]
+
+
+def _join_day_blocks(blocks):
+    return "\n\n".join(block["text"] for block in blocks if block["text"])
+
+
+def _block_text_prompt(itinerary, day, place, old_block):
+    role = place.get("role", "")
+    label = SLOT_LABELS.get(role, f"**{role.capitalize()}**")
+    food = ("\n- The paragraph must describe food options"
+            if role in ("breakfast", "lunch", "dinner") else "")
+    return f"""
+You are editing the Day {day.day_number} itinerary for {itinerary.destination}.
+The place of one block was replaced. Current block:
+
+{old_block}
 
-    weather = get_google_weather_forecast(day.date, itinerary.lat, itinerary.lng)
-    raw_text = generate_day_text_gpt(itinerary, day, current, budget=str(itinerary.budget),
-                                     travelers=itinerary.travelers, interests=itinerary.interests,
-                                     extras=itinerary.extras, weather_info=weather)
-    verified = verify_and_update_places(raw_text, itinerary.lat, itinerary.lng, itinerary.destination)
+New place for this block: {label}: {place["name"]}
+
+Rewrite ONLY this block, keeping its markdown layout and time span. Deliver **exactly**:
+
+• **Time span** (HH:MM-HH:MM) in bold  
+• "📍" + place name **as provided** (do not translate or alter)  
+• One paragraph (≈90 words) explaining what to do / eat there.
+
+**Formatting requirements:**
+- Friendly tone, English{food}
+- Respond with the block only
+
+**User preferences:** {itinerary.extras}
+"""
+
+
+async def _areplace_block(itinerary, day, old_places, places, place_index):
+    """
+    Regenerate only the block of places[place_index] (Day.text_blocks) and
+    splice it in. Returns the new blocks, or None if the block was not found.
+    """
+    blocks = day.text_blocks or _split_day_blocks(day.generated_text, old_places)
+    role = places[place_index].get("role")
+    # o índice do bloco é o do lugar (+1 pelo cabeçalho), conferido pela chave
+    position = place_index + 1
+    if not blocks or position >= len(blocks) or blocks[position]["key"] != role:
+        return None
+
+    old_block = "\n".join(l for l in blocks[position]["text"].splitlines()
+                          if not _is_annotation(l)).strip()
+    prompt = _block_text_prompt(itinerary, day, places[place_index], old_block)
+    response = await aopenai_chatcompletion_with_retry(
+        messages=[{"role": "user", "content": prompt}],
+        model="gpt-4o-mini",
+        temperature=0,
+        max_tokens=400,
+        max_attempts=3,
+    )
+    block = response.choices[0].message["content"].strip()
+    # o lugar novo já vem com endereço: nenhuma busca extra no Places
+    block = await averify_and_update_places(block, itinerary.lat, itinerary.lng,
+                                            itinerary.destination,
+                                            known_places=[places[place_index]])
+
+    blocks = [dict(b) for b in blocks]
+    blocks[position]["text"] = block.strip()
+    return blocks
+
+
+async def _areplace_single_place_in_day(day, place_index, user_observation):
+    # day.itinerary seria uma query síncrona; aqui a busca é explícita
+    itinerary = await Itinerary.objects.aget(pk=day.itinerary_id)
+    place_index = parse_place_index(place_index)
+    if place_index is None:
+        raise ValueError("Invalid place_index")
+    current = await sync_to_async(day_stop_records)(day)
+    # nomes de toda a viagem numa consulta, menos o da parada trocada
+    visited = await sync_to_async(trip_place_names)(itinerary, skip=(day, place_index))
+    old = current[place_index] if place_index < len(current) else None
+
+    # caminho rápido: sem observação do usuário, o próximo candidato do
+    # ranking desse slot (Day.alternates) entra sem GPT nem Places
+    new_place = None
+    if old and not (user_observation or "").strip():
+        new_place = _next_alternate(day, old.get("role"), visited)
+
+    if new_place is None:
+        name = await asuggest_one_new_place_gpt(itinerary, day, visited, user_observation)
+        if name:
+            new_place = await asearch_place_by_name(
+                name,
+                itinerary.destination,
+                itinerary.lat, itinerary.lng
+            )
+            if new_place is None:
+                logger.warning(f"[replace_single_place_in_day] '{name}' not found/validated – keeping original list")
+
+    if old and new_place:
+        new_place = {"role": old.get("role"), "place": new_place["name"], **new_place}
+        places = list(current)
+        places[place_index] = new_place
+        blocks = await _areplace_block(itinerary, day, current, places, place_index)
+        if blocks is not None:
+            day.places_visited = json.dumps(places, ensure_ascii=False)
+            day.text_blocks = blocks
+            day.generated_text = _join_day_blocks(blocks)
+            await day.asave(update_fields=["places_visited", "generated_text",
+                                           "text_blocks", "alternates"])
+            await sync_to_async(save_day_stops)(day, places)
+            return
+
+    # texto sem blocos reconhecíveis (ou nenhum lugar novo): reescreve o dia todo
+    if place_index < len(current):
+        current.pop(place_index)
+    if new_place:
+        current.insert(place_index, new_place)
+
+    weather = await aget_google_weather_forecast(day.date, itinerary.lat, itinerary.lng)
+    chunks = astream_day_text_gpt(itinerary, day, current, budget=str(itinerary.budget),
+                                  travelers=itinerary.travelers, interests=itinerary.interests,
+                                  extras=itinerary.extras, weather_info=weather)
+    verified = await averify_and_update_places_stream(chunks, itinerary.lat, itinerary.lng,
+                                                      itinerary.destination, known_places=current)
 
     day.places_visited = json.dumps(current, ensure_ascii=False)
     day.generated_text = verified
-    day.save(update_fields=["places_visited", "generated_text"])
+    day.text_blocks = _split_day_blocks(verified, current)
+    await day.asave(update_fields=["places_visited", "generated_text",
+                                   "text_blocks", "alternates"])
+    await sync_to_async(save_day_stops)(day, current)
+
 
+replace_single_place_in_day = run_sync(areplace_single_place_in_day)
 
-def suggest_one_new_place_gpt(itinerary, day, visited_set, user_observation):
+
+async def asuggest_one_new_place_gpt(itinerary, day, visited_set, user_observation):
     """
     Ask GPT for a single new place suggestion, given visited_set and user observation.
     """
@@ -796,14 +1923,18 @@ Suggest ONLY ONE place name (no explanation), real and coherent with the context
 Respond with the place name only.
 """
     try:
-        response = openai_chatcompletion_with_retry(
+        response = await aopenai_chatcompletion_with_retry(
             messages=[{"role": "user", "content": prompt}],
             model="gpt-4o-mini",
             temperature=0,
-            max_tokens=6000,
-            max_attempts=3
+            max_tokens=60,      # só um nome
+            max_attempts=3,
+            use_cache=False,    # o usuário pediu *outra* sugestão
         )
         return response.choices[0].message["content"].strip()
     except Exception as e:
         logger.error(f"[suggest_one_new_place_gpt] Failed to suggest place: {e}")
         return ""
+
+
+suggest_one_new_place_gpt = run_sync(asuggest_one_new_place_gpt)
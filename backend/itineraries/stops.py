@@ -0,0 +1,93 @@
+# stops.py
+
+"""
+Leitura e gravação das paradas dos dias (DayStop).
+
+As paradas são gravadas junto com Day.places_visited (que a API continua
+devolvendo) e são a fonte do servidor: marcadores, PDF e troca de lugar
+leem com uma consulta indexada, sem json.loads por dia.
+"""
+
+from django.db import transaction
+
+from .geo import geohash_encode
+from .models import DayStop, Place
+
+RECORD_FIELDS = ("role", "name", "lat", "lng", "address", "place__place_id")
+
+
+def ensure_places(records):
+    """
+    {place_id: Place.id} for the records that carry a place_id. Unknown
+    places are created from the record; indexed ones are left untouched.
+    """
+    new = {}
+    for rec in records:
+        if rec.get("place_id") and rec.get("lat") is not None and rec.get("lng") is not None:
+            lat, lng = float(rec["lat"]), float(rec["lng"])
+            new[rec["place_id"]] = Place(
+                place_id=rec["place_id"], name=rec["name"][:255],
+                address=(rec.get("address") or "")[:500] or None,
+                lat=lat, lng=lng, geohash=geohash_encode(lat, lng),
+            )
+    if not new:
+        return {}
+    Place.objects.bulk_create(new.values(), ignore_conflicts=True)
+    return dict(Place.objects.filter(place_id__in=new).values_list("place_id", "id"))
+
+
+def save_day_stops(day, places):
+    """
+    Replace the stops of `day` with `places` (place_record dicts, in day order).
+    """
+    with transaction.atomic():
+        place_ids = ensure_places(places)
+        DayStop.objects.filter(day=day).delete()
+        DayStop.objects.bulk_create([
+            DayStop(
+                day=day,
+                order=order,
+                role=rec.get("role") or "",
+                name=rec["name"][:255],
+                lat=float(rec["lat"]),
+                lng=float(rec["lng"]),
+                address=rec.get("address"),
+                place_id=place_ids.get(rec.get("place_id")),
+            )
+            for order, rec in enumerate(places)
+            if rec.get("lat") is not None and rec.get("lng") is not None
+        ])
+
+
+def _record(row):
+    place_id = row.pop("place__place_id")
+    return {"role": row["role"], "place": row["name"], **row, "place_id": place_id}
+
+
+def day_stop_records(day):
+    """
+    Stops of a day as place_record dicts (the places_visited format).
+    """
+    rows = DayStop.objects.filter(day=day).order_by("order").values(*RECORD_FIELDS)
+    return [_record(row) for row in rows]
+
+
+def itinerary_stop_records(itinerary):
+    """
+    Stops of every day of an itinerary, in day and stop order (one query).
+    """
+    rows = (DayStop.objects.filter(day__itinerary=itinerary)
+            .order_by("day__day_number", "order").values(*RECORD_FIELDS))
+    return [_record(row) for row in rows]
+
+
+def trip_place_names(itinerary, skip=None):
+    """
+    Lowercase names of the stops of an itinerary; `skip` = (day, order)
+    leaves one stop out (the one being replaced).
+    """
+    stops = DayStop.objects.filter(day__itinerary=itinerary)
+    if skip is not None:
+        day, order = skip
+        stops = stops.exclude(day=day, order=order)
+    return {name.lower() for name in stops.values_list("name", flat=True)}
@@ -1,3 +1,554 @@
-from django.test import TestCase
+import asyncio
+import json
+import time
+from datetime import date, timedelta
+from unittest import mock
 
-# Create your tests here.
+from asgiref.sync import async_to_sync
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.db import connection
+from django.db.migrations.executor import MigrationExecutor
+from django.test import (RequestFactory, SimpleTestCase, TestCase, TransactionTestCase,
+                         override_settings)
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.authtoken.models import Token
+
+from . import async_views, jobs
+from .views import build_markers_json
+from .cache import ResponseCache
+from .geo import geohash_cover, geohash_encode
+from .http_client import UpstreamHTTPError
+from .models import Day, DayStop, Itinerary, Place, PlanningJob
+from .place_index import lookup_places, store_places
+from .stops import day_stop_records, itinerary_stop_records, save_day_stops
+from .resilience import CircuitBreaker, CircuitOpenError, DeadlineExceeded, RetryPolicy
+from .routing import optimize_route
+from .services import (_join_day_blocks, _split_day_blocks, asearch_place_by_name,
+                       asearch_place_candidates)
+
+
+class UpstreamDown(Exception):
+    pass
+
+
+class CircuitBreakerTests(SimpleTestCase):
+
+    def setUp(self):
+        self.breaker = CircuitBreaker("test-upstream", failure_threshold=1, recovery_timeout=0.05)
+        self.policy = RetryPolicy("test-upstream", lambda e: isinstance(e, UpstreamDown),
+                                  max_attempts=1, budget=None)
+
+    def _trip(self):
+        async def down(_):
+            raise UpstreamDown()
+        with self.assertRaises(UpstreamDown):
+            asyncio.run(self.policy.acall(down, breaker=self.breaker))
+        self.assertEqual(self.breaker.state, CircuitBreaker.OPEN)
+        time.sleep(0.06)
+        self.assertEqual(self.breaker.state, CircuitBreaker.HALF_OPEN)
+
+    def test_cancelled_probe_lets_the_next_call_probe(self):
+        self._trip()
+
+        async def cancelled_probe():
+            task = asyncio.create_task(self.policy.acall(lambda _: asyncio.sleep(10),
+                                                         breaker=self.breaker))
+            await asyncio.sleep(0)
+            # enquanto o teste está no ar, ninguém mais passa
+            with self.assertRaises(CircuitOpenError):
+                self.breaker.before_call()
+            task.cancel()
+            with self.assertRaises(asyncio.CancelledError):
+                await task
+
+        asyncio.run(cancelled_probe())
+
+        async def up(_):
+            return "ok"
+        self.assertEqual(asyncio.run(self.policy.acall(up, breaker=self.breaker)), "ok")
+        self.assertEqual(self.breaker.state, CircuitBreaker.CLOSED)
+
+    def test_lost_probe_expires_after_recovery_timeout(self):
+        self._trip()
+        self.breaker.before_call()  # teste que nunca responde
+        with self.assertRaises(CircuitOpenError):
+            self.breaker.before_call()
+        time.sleep(0.06)
+        self.breaker.before_call()
+        self.breaker.record_success()
+        self.assertEqual(self.breaker.state, CircuitBreaker.CLOSED)
+
+
+class ReplacePlaceViewTests(TestCase):
+    INVALID = (None, "abc", -1, "-2", [0], True)
+
+    def setUp(self):
+        self.user = User.objects.create_user("traveler", password="x")
+        self.token = Token.objects.create(user=self.user)
+        itinerary = Itinerary.objects.create(user=self.user, destination="Paris",
+                                             start_date=date(2026, 1, 1), end_date=date(2026, 1, 1))
+        self.day = Day.objects.create(itinerary=itinerary, day_number=1, date=date(2026, 1, 1))
+
+    def _body(self, place_index):
+        body = {"day_id": self.day.id}
+        if place_index is not None:
+            body["place_index"] = place_index
+        return body
+
+    def _post_json(self, url_name, place_index):
+        return self.client.post(reverse(url_name), self._body(place_index),
+                                content_type="application/json",
+                                HTTP_AUTHORIZATION=f"Token {self.token.key}")
+
+    @mock.patch("itineraries.services._areplace_single_place_in_day")
+    def test_api_views_reject_missing_or_invalid_place_index(self, replace):
+        for url_name in ("api_async_replace_place", "api_replace_place"):
+            for place_index in self.INVALID:
+                with self.subTest(view=url_name, place_index=place_index):
+                    response = self._post_json(url_name, place_index)
+                    self.assertEqual(response.status_code, 400)
+                    self.assertEqual(response.json(), {"error": "Invalid place_index"})
+        replace.assert_not_called()
+
+    @mock.patch("itineraries.services._areplace_single_place_in_day")
+    def test_form_view_rejects_invalid_place_index(self, replace):
+        self.client.force_login(self.user)
+        for place_index in ("abc", "-1", None):
+            with self.subTest(place_index=place_index):
+                response = self.client.post(reverse("replace_place"), self._body(place_index))
+                self.assertEqual(response.status_code, 400)
+        replace.assert_not_called()
+
+    @mock.patch("itineraries.services._areplace_single_place_in_day")
+    def test_valid_place_index_reaches_the_replacement(self, replace):
+        for url_name in ("api_async_replace_place", "api_replace_place"):
+            with self.subTest(view=url_name):
+                replace.reset_mock()
+                response = self._post_json(url_name, "2")
+                self.assertEqual(response.status_code, 200)
+                self.assertEqual(replace.call_args.args[1], 2)
+
+
+class ItineraryStreamViewTests(TestCase):
+
+    async def test_planning_starts_before_the_stream_is_read(self):
+        user = await User.objects.acreate(username="streamer")
+        token = await Token.objects.acreate(user=user)
+        request = RequestFactory().post(
+            "/itinerary/api/async/itineraries/stream/",
+            {"destination": "Paris", "start_date": "2026-01-01", "end_date": "2026-01-02",
+             "budget": "500", "travelers": 2},
+            content_type="application/json",
+            HTTP_AUTHORIZATION=f"Token {token.key}",
+        )
+        started = asyncio.Event()
+
+        async def run_job(job, on_ready=None):
+            started.set()
+            return job
+
+        with mock.patch("itineraries.async_views.arun_job", run_job):
+            response = await async_views.itinerary_stream_view(request)
+            # o cliente foi embora sem ler nenhum chunk
+            await asyncio.wait_for(started.wait(), timeout=1)
+        self.assertEqual(response.status_code, 200)
+        await asyncio.gather(*async_views._background_tasks)
+
+
+class ResponseCacheSingleFlightTests(TestCase):
+
+    async def test_fetches_never_overlap_when_results_are_not_cached(self):
+        cache = ResponseCache("test-single-flight", ttl=60, max_entries=10)
+        in_flight, overlap, fetches = 0, 0, 0
+
+        async def fetch():
+            nonlocal in_flight, overlap, fetches
+            in_flight += 1
+            fetches += 1
+            overlap = max(overlap, in_flight)
+            await asyncio.sleep(0.05)
+            in_flight -= 1
+            return None            # upstream com problema: nada é guardado
+
+        first = [asyncio.ensure_future(cache.aget_or_set("k", fetch)) for _ in range(3)]
+        await asyncio.sleep(0.07)  # o 1º fetch terminou, o 2º está no ar
+        late = asyncio.ensure_future(cache.aget_or_set("k", fetch))
+        await asyncio.gather(*first, late)
+
+        self.assertEqual(overlap, 1)
+        self.assertEqual(fetches, 4)
+        self.assertEqual(cache._key_locks, {})
+
+
+class PlanningJobTests(TestCase):
+
+    def setUp(self):
+        user = User.objects.create_user("queued", password="x")
+        self.itinerary = Itinerary.objects.create(user=user, destination="Paris",
+                                                  start_date=date(2026, 1, 1), end_date=date(2026, 1, 2))
+
+    def _running(self, worker, attempts=1, seconds_ago=0):
+        beat = timezone.now() - timedelta(seconds=seconds_ago)
+        return PlanningJob.objects.create(itinerary=self.itinerary, status=PlanningJob.STATUS_RUNNING,
+                                          worker=worker, attempts=attempts, heartbeat_at=beat)
+
+    def test_a_job_is_claimed_by_one_worker_only(self):
+        older = PlanningJob.objects.create(itinerary=self.itinerary)
+        newer = PlanningJob.objects.create(itinerary=self.itinerary)
+        broker = jobs.DatabaseBroker()
+
+        self.assertEqual(broker.claim("w1").pk, older.pk)
+        self.assertEqual(broker.claim("w2").pk, newer.pk)
+        self.assertIsNone(broker.claim("w3"))
+        older.refresh_from_db()
+        self.assertEqual((older.status, older.worker, older.attempts),
+                         (PlanningJob.STATUS_RUNNING, "w1", 1))
+
+    def test_claim_skips_a_job_taken_after_it_was_listed(self):
+        job = PlanningJob.objects.create(itinerary=self.itinerary)
+        listed = PlanningJob.objects.filter
+        # outro worker pega o job entre a listagem e o UPDATE condicional
+        def racing_filter(*args, **kwargs):
+            if kwargs.get("pk") == job.pk:
+                listed(pk=job.pk).update(status=PlanningJob.STATUS_RUNNING, worker="w2")
+            return listed(*args, **kwargs)
+
+        with mock.patch.object(PlanningJob.objects, "filter", side_effect=racing_filter):
+            self.assertIsNone(jobs.DatabaseBroker().claim("w1"))
+        job.refresh_from_db()
+        self.assertEqual(job.worker, "w2")
+
+    def test_requeue_stale_jobs(self):
+        stale = settings.PLANNING_JOB_STALE_AFTER + 5
+        retry = self._running("w1", attempts=1, seconds_ago=stale)
+        exhausted = self._running("w1", attempts=settings.PLANNING_JOB_MAX_ATTEMPTS, seconds_ago=stale)
+        in_request = [self._running(worker, seconds_ago=stale) for worker in jobs.IN_REQUEST_WORKERS]
+        alive = self._running("w1", seconds_ago=10)
+
+        self.assertEqual(jobs.requeue_stale_jobs(), 1)
+
+        def state(job):
+            job.refresh_from_db()
+            return job.status, job.worker
+        self.assertEqual(state(retry), (PlanningJob.STATUS_QUEUED, ""))
+        self.assertEqual(state(exhausted)[0], PlanningJob.STATUS_FAILED)
+        for job in in_request:
+            self.assertEqual(state(job)[0], PlanningJob.STATUS_FAILED)
+        self.assertEqual(state(alive), (PlanningJob.STATUS_RUNNING, "w1"))
+
+    @override_settings(PLANNING_JOB_HEARTBEAT_INTERVAL=0.02)
+    def test_heartbeat_advances_while_a_stage_runs_silently(self):
+        job = self._running("w1", seconds_ago=600)
+        before = job.heartbeat_at
+
+        async def silent_planning(itinerary, progress=None, on_ready=None):
+            await asyncio.sleep(0.1)
+
+        with mock.patch("itineraries.jobs.agenerate_itinerary", silent_planning):
+            job = jobs.run_job(job)
+        self.assertEqual(job.status, PlanningJob.STATUS_DONE)
+        self.assertGreater(job.heartbeat_at, before + timedelta(seconds=500))
+
+    def test_run_that_lost_its_job_discards_its_result(self):
+        job = self._running("w1")
+
+        async def taken_over(itinerary, progress=None, on_ready=None):
+            # requeue + claim por outro worker no meio da execução
+            await PlanningJob.objects.filter(pk=job.pk).aupdate(worker="w2", stage="day 1/2")
+            raise RuntimeError("Day rows deleted by the rerun")
+
+        with mock.patch("itineraries.jobs.agenerate_itinerary", taken_over):
+            job = jobs.run_job(job)
+        self.assertEqual((job.status, job.worker, job.stage),
+                         (PlanningJob.STATUS_RUNNING, "w2", "day 1/2"))
+        self.assertIsNone(job.error)
+
+
+DAY_TEXT = """# Day 1 – Paris
+
+A relaxed first day on the Left Bank.
+
+**08:00-09:00**
+🍳 **Breakfast**
+📍 Café de Flore
+📍 **Address:** 172 Bd Saint-Germain, Paris
+Croissants and coffee on the terrace.
+
+**10:00-12:30**
+📍 **Musée d'Orsay**
+Impressionists in a former railway station.
+
+**13:00-14:00**
+📍 Le Procope
+Classic French lunch.
+
+💡 **Final tip:** buy a carnet of metro tickets."""
+
+DAY_PLACES = [
+    {"role": "breakfast", "name": "Café de Flore"},
+    {"role": "morning", "name": "Musee d'Orsay"},
+    {"role": "lunch", "name": "Le Procope"},
+]
+
+
+class DayBlocksTests(SimpleTestCase):
+
+    def test_split_then_join_round_trips(self):
+        blocks = _split_day_blocks(DAY_TEXT, DAY_PLACES)
+        self.assertEqual([b["key"] for b in blocks],
+                         ["header", "breakfast", "morning", "lunch", "final_tip"])
+        self.assertEqual(_join_day_blocks(blocks), DAY_TEXT)
+
+    def test_block_keeps_its_heading_and_address(self):
+        blocks = _split_day_blocks(DAY_TEXT, DAY_PLACES)
+        breakfast = blocks[1]["text"].splitlines()
+        self.assertEqual(breakfast[0], "**08:00-09:00**")
+        self.assertIn("📍 **Address:** 172 Bd Saint-Germain, Paris", breakfast)
+        self.assertTrue(blocks[2]["text"].startswith("**10:00-12:30**"))
+        self.assertTrue(blocks[4]["text"].startswith("💡 **Final tip:**"))
+
+    def test_missing_pin_cannot_be_split(self):
+        text = DAY_TEXT.replace("📍 Le Procope", "Le Procope")
+        self.assertIsNone(_split_day_blocks(text, DAY_PLACES))
+
+    def test_places_out_of_text_order_cannot_be_split(self):
+        self.assertIsNone(_split_day_blocks(DAY_TEXT, DAY_PLACES[::-1]))
+
+    def test_renamed_place_is_found_in_the_new_text(self):
+        blocks = _split_day_blocks(DAY_TEXT, DAY_PLACES)
+        blocks[2]["text"] = "**10:00-12:30**\n📍 Musée de l'Orangerie\nMonet's water lilies."
+        places = [DAY_PLACES[0], {"role": "morning", "name": "Musée de l'Orangerie"}, DAY_PLACES[2]]
+
+        resplit = _split_day_blocks(_join_day_blocks(blocks), places)
+        self.assertEqual(resplit, blocks)
+        # o nome antigo não está mais no texto
+        self.assertIsNone(_split_day_blocks(_join_day_blocks(blocks), DAY_PLACES))
+
+
+class GeohashTests(SimpleTestCase):
+
+    def test_known_vectors(self):
+        self.assertEqual(geohash_encode(57.64911, 10.40744, 11), "u4pruydqqvj")
+        self.assertEqual(geohash_encode(42.6, -5.6, 5), "ezs42")
+        self.assertEqual(geohash_encode(-25.382708, -49.265506, 8), "6gkzwgjz")
+
+    def test_cover_contains_every_point_of_the_circle(self):
+        lat, lng, radius_km = 48.8566, 2.3522, 3.0
+        prefixes = geohash_cover(lat, lng, radius_km)
+        self.assertLess(len(prefixes), 50)
+        step = radius_km / 111.32
+        for dlat, dlng in ((0, 0), (step, 0), (-step, 0), (0, step * 1.5), (0, -step * 1.5)):
+            point = geohash_encode(lat + dlat * 0.95, lng + dlng * 0.95)
+            self.assertTrue(any(point.startswith(p) for p in prefixes), (dlat, dlng))
+
+
+class OptimizeRouteTests(SimpleTestCase):
+    ROLES = ["breakfast", "morning", "lunch", "afternoon", "dinner", "evening"]
+
+    def test_flexible_slots_swap_and_meals_stay(self):
+        # a atividade da manhã fica longe do café e perto do jantar: trocar as duas encurta o dia
+        options = {
+            "breakfast": [(48.85, 2.30)],
+            "morning": [(48.85, 2.40)],
+            "lunch": [(48.85, 2.32)],
+            "afternoon": [(48.85, 2.31)],
+            "dinner": [(48.85, 2.41)],
+            "evening": [(48.85, 2.42)],
+        }
+        order, picks = optimize_route(self.ROLES, options, rank_penalty_km=1.5)
+        self.assertEqual(order, ["breakfast", "afternoon", "lunch", "morning", "dinner", "evening"])
+        self.assertEqual(picks, [0] * 6)
+
+    def test_meal_slots_never_move(self):
+        far = {role: [(48.85 + 0.05 * i, 2.30 - 0.04 * i)] for i, role in enumerate(self.ROLES)}
+        order, _ = optimize_route(self.ROLES[::-1], far, rank_penalty_km=0)
+        for position, role in enumerate(self.ROLES[::-1]):
+            if role not in ("morning", "afternoon"):
+                self.assertEqual(order[position], role)
+
+    def test_worse_ranked_candidate_only_when_it_saves_more_than_the_penalty(self):
+        options = {role: [(48.85, 2.30)] for role in self.ROLES}
+        options["lunch"] = [(48.90, 2.30), (48.8501, 2.3001)]   # o 2º fica ~5 km mais perto
+        _, picks = optimize_route(self.ROLES, options, rank_penalty_km=1.5)
+        self.assertEqual(picks[2], 1)
+        _, picks = optimize_route(self.ROLES, options, rank_penalty_km=50)
+        self.assertEqual(picks[2], 0)
+
+
+class PlacesDownTests(SimpleTestCase):
+
+    def test_search_by_name_degrades_to_none(self):
+        for error in (CircuitOpenError("places circuit is open"), DeadlineExceeded("late"),
+                      UpstreamHTTPError(503, "places"), asyncio.TimeoutError()):
+            with self.subTest(error=type(error).__name__), \
+                    mock.patch("itineraries.services.aplaces_text_search", side_effect=error):
+                self.assertIsNone(asyncio.run(asearch_place_by_name("Louvre", "Paris", 48.85, 2.35)))
+
+
+class OverviewFailureTests(TestCase):
+
+    def test_failing_overview_still_finishes_the_job(self):
+        user = User.objects.create_user("planner", password="x")
+        itinerary = Itinerary.objects.create(user=user, destination="Paris",
+                                             start_date=date(2026, 1, 1), end_date=date(2026, 1, 2))
+        PlanningJob.objects.create(itinerary=itinerary)
+        job = jobs.DatabaseBroker().claim("w1")
+
+        with mock.patch("itineraries.services.aget_cordinates_google_geocoding",
+                        mock.AsyncMock(return_value=(48.85, 2.35))), \
+                mock.patch("itineraries.services._aplan_days", mock.AsyncMock()), \
+                mock.patch("itineraries.services.agenerate_itinerary_overview",
+                           mock.AsyncMock(side_effect=DeadlineExceeded("overview"))):
+            job = jobs.run_job(job)
+
+        self.assertEqual(job.status, PlanningJob.STATUS_DONE)
+        itinerary.refresh_from_db()
+        self.assertEqual(itinerary.generated_text, "")
+        self.assertEqual(float(itinerary.lat), 48.85)
+
+
+def places_result(name, lat, lng, rating=4.5):
+    return {"name": name, "place_id": f"id-{name}", "formatted_address": f"{name}, Paris",
+            "geometry": {"location": {"lat": lat, "lng": lng}},
+            "business_status": "OPERATIONAL", "rating": rating, "user_ratings_total": 100}
+
+
+@override_settings(PLACE_INDEX_ENABLED=True, PLACE_INDEX_MIN_CANDIDATES=3)
+class PlaceIndexTests(TestCase):
+    CENTER = (48.8566, 2.3522)
+    CRITERIA = {"radius_m": 3000, "min_rating": 4.0, "max_price": None}
+
+    def setUp(self):
+        # ~1 km para leste a cada passo: 0, 1, 2 km dentro do raio, 6 km fora
+        self.nearby = [places_result(f"cafe {km}", self.CENTER[0], self.CENTER[1] + km / 73.2)
+                       for km in (0, 1, 2)]
+        self.far = places_result("cafe far", self.CENTER[0], self.CENTER[1] + 6 / 73.2)
+
+    def _search(self, category, places_response):
+        text_search = mock.AsyncMock(return_value=places_response)
+        with mock.patch("itineraries.services.aplaces_text_search", text_search):
+            # async_to_sync: o ORM roda nesta thread, dentro da transação do teste
+            found = async_to_sync(asearch_place_candidates)(category, "Paris", *self.CENTER,
+                                                            self.CRITERIA)
+        return found, text_search
+
+    def test_lookup_filters_by_category_and_area(self):
+        store_places("Breakfast Café", self.nearby + [self.far])
+        store_places("museum", [places_result("Louvre", 48.8606, 2.3376)])
+
+        names = {p["name"] for p in lookup_places("breakfast cafe", *self.CENTER, 3)}
+        self.assertTrue({"cafe 0", "cafe 1", "cafe 2"} <= names)
+        self.assertNotIn("Louvre", names)
+        self.assertEqual(lookup_places("bakery", *self.CENTER, 3), [])
+
+    def test_stale_places_are_not_served(self):
+        store_places("cafe", self.nearby)
+        Place.objects.update(updated_at=timezone.now() - timedelta(days=365))
+        self.assertEqual(lookup_places("cafe", *self.CENTER, 3), [])
+
+    def test_enough_indexed_candidates_skip_places(self):
+        store_places("cafe", self.nearby + [self.far])
+        found, text_search = self._search("cafe", {"status": "OK", "results": []})
+
+        text_search.assert_not_called()
+        # a distância exata é conferida depois do índice
+        self.assertEqual([p["name"] for p in found], ["cafe 0", "cafe 1", "cafe 2"])
+
+    def test_thin_index_falls_back_to_places_and_fills_the_index(self):
+        store_places("cafe", self.nearby[:1])
+        found, text_search = self._search("cafe", {"status": "OK", "results": self.nearby})
+
+        text_search.assert_awaited_once()
+        self.assertEqual(len(found), 3)
+        self.assertEqual(len(lookup_places("cafe", *self.CENTER, 3)), 3)
+
+    @override_settings(PLACE_INDEX_ENABLED=False)
+    def test_disabled_index_always_asks_places(self):
+        store_places("cafe", self.nearby)
+        _, text_search = self._search("cafe", {"status": "OK", "results": self.nearby})
+        text_search.assert_awaited_once()
+
+
+def stop(role, name, lat, lng, place_id=None):
+    return {"role": role, "place": name, "name": name, "lat": lat, "lng": lng,
+            "address": f"{name}, Paris", "place_id": place_id}
+
+
+class DayStopTests(TestCase):
+
+    def setUp(self):
+        user = User.objects.create_user("stops", password="x")
+        self.itinerary = Itinerary.objects.create(user=user, destination="Paris", lat=48.8566, lng=2.3522,
+                                                  start_date=date(2026, 1, 1), end_date=date(2026, 1, 2))
+        # criados fora de ordem: a leitura ordena por day_number / order
+        self.day2 = Day.objects.create(itinerary=self.itinerary, day_number=2, date=date(2026, 1, 2))
+        self.day1 = Day.objects.create(itinerary=self.itinerary, day_number=1, date=date(2026, 1, 1))
+        self.places1 = [stop("breakfast", "Café de Flore", 48.8541, 2.3327, "flore"),
+                        stop("morning", "Louvre", 48.8606, 2.3376, "louvre"),
+                        stop("lunch", "Le Procope", 48.8530, 2.3389)]
+        self.places2 = [stop("morning", "Orsay", 48.8600, 2.3266, "orsay")]
+
+    def test_save_then_read_round_trips_places_visited(self):
+        save_day_stops(self.day1, self.places1)
+        self.assertEqual(day_stop_records(self.day1), self.places1)
+        self.assertEqual(Place.objects.filter(place_id__in=["flore", "louvre"]).count(), 2)
+
+    def test_saving_again_replaces_the_stops(self):
+        save_day_stops(self.day1, self.places1)
+        save_day_stops(self.day1, self.places1[::-1][:2])
+        self.assertEqual([r["role"] for r in day_stop_records(self.day1)], ["lunch", "morning"])
+        self.assertEqual(DayStop.objects.filter(day=self.day1).count(), 2)
+
+    def test_itinerary_stops_and_markers_in_day_order_with_one_query(self):
+        save_day_stops(self.day2, self.places2)
+        save_day_stops(self.day1, self.places1)
+        self.assertEqual(itinerary_stop_records(self.itinerary), self.places1 + self.places2)
+
+        with self.assertNumQueries(1):
+            markers = json.loads(build_markers_json(self.itinerary))
+        self.assertEqual([m["name"] for m in markers],
+                         ["Paris", "Café de Flore", "Louvre", "Le Procope", "Orsay"])
+
+
+class DayStopBackfillMigrationTests(TransactionTestCase):
+    before = [("itineraries", "0022_daystop")]
+    after = [("itineraries", "0023_daystop_from_places_visited")]
+
+    def tearDown(self):
+        executor = MigrationExecutor(connection)
+        executor.migrate(executor.loader.graph.leaf_nodes())
+
+    def test_backfill_creates_stops_from_places_visited(self):
+        executor = MigrationExecutor(connection)
+        executor.migrate(self.before)
+        apps = executor.loader.project_state(self.before).apps
+        User_ = apps.get_model("auth", "User")
+        Itinerary_ = apps.get_model("itineraries", "Itinerary")
+        Day_ = apps.get_model("itineraries", "Day")
+
+        user = User_.objects.create(username="legacy")
+        itinerary = Itinerary_.objects.create(user=user, destination="Paris",
+                                              start_date=date(2026, 1, 1), end_date=date(2026, 1, 2))
+        places = [stop("breakfast", "Café de Flore", 48.8541, 2.3327, "flore"),
+                  {"name": "Sem coordenadas"},
+                  stop("lunch", "Le Procope", 48.8530, 2.3389)]
+        day = Day_.objects.create(itinerary=itinerary, day_number=1, date=date(2026, 1, 1),
+                                  places_visited=json.dumps(places))
+        Day_.objects.create(itinerary=itinerary, day_number=2, date=date(2026, 1, 2),
+                            places_visited="not json")
+
+        executor = MigrationExecutor(connection)
+        executor.migrate(self.after)
+        apps = executor.loader.project_state(self.after).apps
+        DayStop_ = apps.get_model("itineraries", "DayStop")
+        Place_ = apps.get_model("itineraries", "Place")
+
+        stops = list(DayStop_.objects.filter(day_id=day.id).order_by("order")
+                     .values_list("order", "role", "name", "place__place_id"))
+        self.assertEqual(stops, [(0, "breakfast", "Café de Flore", "flore"),
+                                 (1, "lunch", "Le Procope", None)])
+        self.assertEqual(DayStop_.objects.count(), 2)
+        self.assertEqual(Place_.objects.get(place_id="flore").geohash,
+                         geohash_encode(48.8541, 2.3327))
@@ -1,7 +1,7 @@
 # itineraries/urls.py
 
 from django.urls import path
-from . import views, api_views
+from . import views, api_views, async_views
 
 urlpatterns = [
     path('dashboard/', views.dashboard_view, name='dashboard'),
@@ -10,10 +10,18 @@ urlpatterns = [
     path("proxy_google_photo/", views.google_photo_proxy, name="proxy_google_photo"),
     path('delete-itinerary/<int:pk>/', views.delete_itinerary_view, name='delete_itinerary'),
     path('export-pdf/<int:pk>/', views.export_itinerary_pdf_view, name='export_itinerary_pdf'),
+    path('jobs/<int:pk>/status/', views.planning_job_status_view, name='planning_job_status'),
+    path('ops/upstreams/', views.ops_upstreams_view, name='ops_upstreams'),
 
     # API REST endpoints
     path("api/itineraries/", api_views.ItineraryListCreateView.as_view(), name="api_itineraries"),
     path("api/itineraries/<int:pk>/", api_views.ItineraryDetailView.as_view(), name="api_itinerary_detail"),
+    path("api/jobs/<int:pk>/", api_views.PlanningJobDetailView.as_view(), name="api_planning_job"),
     path("api/replace_place/", api_views.ReplacePlaceAPIView.as_view(), name="api_replace_place"),
     path("api/test/", api_views.TestAPIView.as_view(), name="api_test"),
+
+    # API assíncrona (ASGI): planeja dentro do request, sem worker
+    path("api/async/itineraries/", async_views.itinerary_create_view, name="api_async_itineraries"),
+    path("api/async/itineraries/stream/", async_views.itinerary_stream_view, name="api_async_itineraries_stream"),
+    path("api/async/replace_place/", async_views.replace_place_view, name="api_async_replace_place"),
 ]
@@ -7,12 +7,11 @@ import os
 import re
 import time
 import urllib.parse
-from datetime import timedelta
 from urllib.parse import quote
 
 import openai
-import requests
 from django.conf import settings
+from django.contrib.admin.views.decorators import staff_member_required
 from django.contrib.auth.decorators import login_required
 from django.http import HttpResponse, JsonResponse
 from django.shortcuts import get_object_or_404, redirect, render
@@ -21,11 +20,15 @@ from django.urls import reverse
 from dotenv import load_dotenv
 from weasyprint import HTML
 
+from .cache import cache_stats
 from .forms import ItineraryForm, ReviewForm
-from .models import Day, Itinerary
-from .services import (generate_itinerary_overview,
-                       get_cordinates_google_geocoding, plan_one_day_itinerary,
-                       replace_single_place_in_day)
+from .http_client import http_get
+from .jobs import enqueue_itinerary
+from .models import Day, Itinerary, PlanningJob
+from .resilience import breaker_stats, retry_stats
+from .serializers import PlanningJobSerializer
+from .services import parse_place_index, replace_single_place_in_day
+from .stops import itinerary_stop_records
 
 load_dotenv()
 openai.api_key = os.getenv('OPENAI_KEY')
@@ -54,24 +57,8 @@ def build_markers_json(itinerary):
                 f"[build_markers_json] Falha ao converter lat/lng do itinerário {itinerary.id}: {e}"
             )
 
-    # Acrescenta marcadores dos locais visitados em cada dia
-    for day in itinerary.days.all():
-        if day.places_visited:
-            try:
-                places = json.loads(day.places_visited)
-                if isinstance(places, list):
-                    for p in places:
-                        # Verifica se p tem lat/lng
-                        if "lat" in p and "lng" in p:
-                            all_markers.append(p)
-                        else:
-                            logger.info(f"[build_markers_json] Local sem coordenadas, day={day.id}, place={p}")
-                else:
-                    logger.info(f"[build_markers_json] places_visited não é lista, day={day.id}")
-            except Exception as ex:
-                logger.warning(
-                    f"[build_markers_json] Erro ao processar JSON places_visited do dia {day.id}: {ex}"
-                )
+    # Acrescenta marcadores dos locais visitados em cada dia (uma consulta em DayStop)
+    all_markers.extend(itinerary_stop_records(itinerary))
 
     logger.debug(f"[build_markers_json] Itinerário={itinerary.id}, total de marcadores={len(all_markers)}")
     return json.dumps(all_markers, ensure_ascii=False)
@@ -90,32 +77,9 @@ def dashboard_view(request):
             itinerary.interests = ', '.join(selected_interests)
             itinerary.save()
 
-            lat, lng = get_cordinates_google_geocoding(itinerary.destination)
-            itinerary.lat = lat
-            itinerary.lng = lng
-
-            overview = generate_itinerary_overview(itinerary)
-            itinerary.generated_text = overview
-            itinerary.save()
-
-            current_date = itinerary.start_date
-            day_number = 1
-            visited_places_list = []
-            while current_date <= itinerary.end_date:
-                day = Day.objects.create(
-                    itinerary=itinerary,
-                    day_number=day_number,
-                    date=current_date
-                )
-                day_text, final_places = plan_one_day_itinerary(itinerary, day, visited_places_list)
-                day.generated_text = day_text
-                day.save()
-
-                visited_places_list.extend(final_places)
-                current_date += timedelta(days=1)
-                day_number += 1
-
-            return redirect(f"{reverse('dashboard')}?new_itinerary_id={itinerary.id}")
+            # planejamento roda no worker; o dashboard acompanha via polling
+            job = enqueue_itinerary(itinerary)
+            return redirect(f"{reverse('dashboard')}?job_id={job.id}")
         else:
             itineraries = (
                 Itinerary.objects
@@ -137,15 +101,26 @@ def dashboard_view(request):
         for it in itineraries:
             it.markers_json = build_markers_json(it)
         new_itinerary_id = request.GET.get('new_itinerary_id', '')
+        job_id = request.GET.get('job_id', '')
         return render(request, 'itineraries/dashboard.html', {
             'form': form,
             'itineraries': itineraries,
             'googlemaps_key': settings.GOOGLEMAPS_KEY,
             'new_itinerary_id': new_itinerary_id,
+            'job_id': job_id if job_id.isdigit() else '',
             'interests': interests,
         })
 
 
+@login_required
+def planning_job_status_view(request, pk):
+    """
+    Status do PlanningJob em JSON, consultado pelo dashboard enquanto o worker gera o itinerário.
+    """
+    job = get_object_or_404(PlanningJob, pk=pk, itinerary__user=request.user)
+    return JsonResponse(PlanningJobSerializer(job).data)
+
+
 @login_required
 def delete_itinerary_view(request, pk):
     if request.method == 'POST':
@@ -174,22 +149,8 @@ def export_itinerary_pdf_view(request, pk):
         except (ValueError, TypeError) as e:
             logger.warning(f"[export_itinerary_pdf_view] Falha ao converter lat/lng: {e}")
 
-    for day in itinerary.days.all():
-        if day.places_visited:
-            try:
-                day_places = json.loads(day.places_visited)
-                if isinstance(day_places, list):
-                    for place in day_places:
-                        try:
-                            markers_list.append({
-                                "name": place.get("name", ""),
-                                "lat": float(place["lat"]),
-                                "lng": float(place["lng"]),
-                            })
-                        except (KeyError, ValueError, TypeError) as e:
-                            logger.warning(f"[export_itinerary_pdf_view] Erro ao extrair lat/lng de place: {e}")
-            except json.JSONDecodeError as e:
-                logger.warning(f"[export_itinerary_pdf_view] JSONDecodeError ao processar places_visited: {e}")
+    markers_list.extend({"name": p["name"], "lat": p["lat"], "lng": p["lng"]}
+                        for p in itinerary_stop_records(itinerary))
 
     markers_params = []
     for i, marker in enumerate(markers_list):
@@ -212,7 +173,7 @@ def export_itinerary_pdf_view(request, pk):
 
     # Download do mapa para incluir no PDF
     try:
-        response = requests.get(map_url, timeout=10)
+        response = http_get(map_url, timeout=10)
         if response.status_code == 200 and response.content:
             raw_image = base64.b64encode(response.content).decode('utf-8')
             map_img_b64 = f"data:image/png;base64,{raw_image}"
@@ -255,20 +216,34 @@ def add_review_view(request, pk):
 def replace_place_view(request):
     if request.method == 'POST':
         day_id = request.POST.get('day_id')
-        place_index = request.POST.get('place_index')
+        place_index = parse_place_index(request.POST.get('place_index'))
         observation = request.POST.get('observation', '')
 
         day = get_object_or_404(Day, pk=day_id, itinerary__user=request.user)
         itinerary = day.itinerary
+        if place_index is None:
+            return HttpResponse("Invalid place_index", status=400)
         logger.info(f"[replace_place_view] Substituindo lugar do dia {day_id}, place_index={place_index}")
         replace_single_place_in_day(day, place_index, observation)
         return redirect(f"{reverse('dashboard')}?new_itinerary_id={itinerary.id}")
 
     return redirect('dashboard')
 
+@staff_member_required
+def ops_upstreams_view(request):
+    """
+    Contadores (por processo) de circuit breakers, retries e caches das chamadas externas.
+    """
+    return JsonResponse({
+        "breakers": breaker_stats(),
+        "retries": retry_stats(),
+        "caches": cache_stats(),
+    })
+
+
 def _safe_proxy(url):
     try:
-        resp = requests.get(url, timeout=HTTP_TIMEOUT)
+        resp = http_get(url, timeout=HTTP_TIMEOUT)
         return JsonResponse(resp.json(), safe=False, status=resp.status_code)
     except Exception as e:
         logger.error(f"[proxy] {e}")
@@ -301,7 +276,7 @@ def google_photo_proxy(request):
     }
 
     try:
-        response = requests.get(url, params=params, stream=True)
+        response = http_get(url, params=params, timeout=HTTP_TIMEOUT)
         if response.status_code == 200:
             return HttpResponse(response.content, content_type=response.headers.get("Content-Type"))
         return HttpResponse("Erro ao buscar imagem", status=500)
@@ -15,8 +15,49 @@ DEBUG = os.getenv('DEBUG', 'False') == 'True'
 #ALLOWED_HOSTS = os.getenv("ALLOWED_HOSTS", "127.0.0.1,localhost").split(",")
 ALLOWED_HOSTS = ['*']
 REQUEST_TIMEOUT      = 15        # segundos em todas as chamadas externas
+HTTP_POOL_CONNECTIONS = 10       # pools keep-alive (um por host externo)
+HTTP_POOL_MAXSIZE     = int(os.getenv('HTTP_POOL_MAXSIZE', 32))  # conexões por host; >= dias × buscas em paralelo
 MAX_ITINERARY_DAYS   = 7
 
+# Fila de geração de itinerários (itineraries/jobs.py)
+PLANNING_JOB_BROKER        = os.getenv('PLANNING_JOB_BROKER', 'itineraries.jobs.DatabaseBroker')
+PLANNING_JOB_POLL_INTERVAL = 2      # segundos entre consultas do worker
+PLANNING_JOB_HEARTBEAT_INTERVAL = 30  # segundos entre heartbeats de um job rodando
+PLANNING_JOB_STALE_AFTER   = 900    # sem heartbeat por esse tempo → job volta para a fila (> PLANNING_DEADLINE)
+PLANNING_JOB_MAX_ATTEMPTS  = 2
+PLANNING_DAY_CONCURRENCY   = int(os.getenv('PLANNING_DAY_CONCURRENCY', 4))  # dias planejados em paralelo (1 = sequencial)
+PLACES_SEARCH_CONCURRENCY  = 6      # buscas no Places em paralelo por dia (uma por slot)
+PLANNING_MODE              = os.getenv('PLANNING_MODE', 'per_day')  # 'per_day' | 'one_shot'
+ONE_SHOT_DAYS_PER_CALL     = 8      # dias por chamada de narrativa no modo one_shot
+ALTERNATES_PER_SLOT        = 5      # candidatos ranqueados guardados por slot (Day.alternates) para trocas
+ROUTE_CANDIDATES_PER_SLOT  = 3      # candidatos do ranking considerados por slot na rota do dia
+ROUTE_RANK_PENALTY_KM      = 1.5    # "custo" em km de descer uma posição no ranking
+DAY_AREAS_ENABLED          = os.getenv('DAY_AREAS_ENABLED', 'True') == 'True'  # um bairro por dia (k-means)
+DAY_AREAS_MAX_INTERESTS    = 3      # interesses buscados no pool de candidatos da viagem
+DAY_AREA_MIN_RADIUS_KM     = 2.0    # raio da busca de um dia na sua área
+DAY_AREA_MAX_RADIUS_KM     = 8.0
+PLACE_INDEX_ENABLED        = os.getenv('PLACE_INDEX_ENABLED', 'True') == 'True'  # índice local antes do Places
+GAZETTEER_ENABLED          = os.getenv('GAZETTEER_ENABLED', 'True') == 'True'  # destinos conhecidos antes da Geocoding API
+PLACE_INDEX_MIN_CANDIDATES = 5      # candidatos válidos no índice para dispensar o Places
+PLACE_INDEX_MAX_AGE_DAYS   = 90     # lugares vistos há mais tempo voltam a ser buscados
+
+# Cache persistente de respostas externas (itineraries/cache.py); TTL 0 desliga
+PLACES_CACHE_TTL           = int(os.getenv('PLACES_CACHE_TTL', 7 * 24 * 3600))
+PLACES_CACHE_MAX_ENTRIES   = 50_000
+WEATHER_CACHE_TTL          = int(os.getenv('WEATHER_CACHE_TTL', 3 * 3600))
+WEATHER_CACHE_MAX_ENTRIES  = 5_000
+OPENAI_CACHE_TTL           = int(os.getenv('OPENAI_CACHE_TTL', 7 * 24 * 3600))
+OPENAI_CACHE_MAX_ENTRIES   = 20_000
+
+# Retry das chamadas externas (itineraries/resilience.py)
+RETRY_MAX_DELAY             = 4     # teto do back-off (segundos)
+RETRY_BUDGET_RATIO          = 0.2   # retries podem somar até 20% dos requests...
+RETRY_BUDGET_MIN_PER_SECOND = 1     # ...mais uma reserva de 1 retry/s
+PLANNING_DEADLINE           = 600   # prazo total das chamadas externas de um itinerário
+CIRCUIT_FAILURE_THRESHOLD   = 5     # falhas seguidas que abrem o circuito de um upstream
+CIRCUIT_RECOVERY_TIMEOUT    = 30    # segundos aberto antes da chamada de teste (half-open)
+REPLACE_PLACE_DEADLINE      = 60
+
 # Service account for Google APIs
 os.environ["GOOGLE_APPLICATION_CREDENTIALS"] = os.path.join(BASE_DIR, 'config/credentials.json')
 
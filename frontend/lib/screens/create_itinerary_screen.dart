@@ -23,6 +23,7 @@ class _CreateItineraryScreenState extends State<CreateItineraryScreen> {
   DateTime? _endDate;
   List<String> _selectedInterests = [];
   bool _isLoading = false; // <-- flag de loading
+  String? _jobStage; // etapa do job enquanto o worker gera o itinerário
 
   final _interestsOptions = [
     'Culture',
@@ -66,7 +67,20 @@ class _CreateItineraryScreenState extends State<CreateItineraryScreen> {
         body: json.encode(body),
       );
 
-      if (response.statusCode == 201) {
+      // 202: itinerário aceito, gerado em background (status em /itinerary/api/jobs/<id>/)
+      if (response.statusCode == 202) {
+        final job = json.decode(response.body)['job'];
+        final error = await _waitForJob(job['id']);
+        if (error != null) {
+          if (mounted) {
+            ScaffoldMessenger.of(context).showSnackBar(
+              SnackBar(content: Text('Error creating itinerary: $error')),
+            );
+          }
+        } else if (mounted) {
+          Navigator.of(context).pop(true);
+        }
+      } else if (response.statusCode == 201) {
         // volta pra dashboard e recarrega
         if (mounted) {
           Navigator.of(context).pop(true);
@@ -84,8 +98,41 @@ class _CreateItineraryScreenState extends State<CreateItineraryScreen> {
         SnackBar(content: Text('Error creating itinerary: $e')),
       );
     } finally {
-      setState(() => _isLoading = false);
+      if (mounted) {
+        setState(() {
+          _isLoading = false;
+          _jobStage = null;
+        });
+      }
+    }
+  }
+
+  /// Consulta o job até terminar; devolve a mensagem de erro ou null se deu certo.
+  Future<String?> _waitForJob(int jobId) async {
+    final url = Uri.parse('http://192.168.22.105:8000/itinerary/api/jobs/$jobId/');
+    final giveUp = DateTime.now().add(const Duration(minutes: 15));
+
+    while (mounted && DateTime.now().isBefore(giveUp)) {
+      await Future.delayed(const Duration(seconds: 2));
+      final res = await http.get(
+        url,
+        headers: {
+          'Authorization': 'Token ${widget.token}',
+          'Content-Type': 'application/json',
+        },
+      ).timeout(const Duration(seconds: 15));
+      if (res.statusCode != 200) {
+        return 'HTTP ${res.statusCode}';
+      }
+
+      final job = json.decode(res.body);
+      if (job['status'] == 'done') return null;
+      if (job['status'] == 'failed') return job['error'] ?? 'planning failed';
+      if (mounted) {
+        setState(() => _jobStage = '${job['stage']} (${job['progress']}%)');
+      }
     }
+    return 'timed out waiting for the itinerary';
   }
 
   @override
@@ -210,8 +257,17 @@ class _CreateItineraryScreenState extends State<CreateItineraryScreen> {
             Positioned.fill(
               child: Container(
                 color: Colors.black.withValues(alpha: 0.5),
-                child: const Center(
-                  child: CircularProgressIndicator(),
+                child: Center(
+                  child: Column(
+                    mainAxisSize: MainAxisSize.min,
+                    children: [
+                      const CircularProgressIndicator(),
+                      if (_jobStage != null) ...[
+                        const SizedBox(height: 16),
+                        Text(_jobStage!, style: const TextStyle(color: Colors.white)),
+                      ],
+                    ],
+                  ),
                 ),
               ),
             ),
@@ -47,6 +47,11 @@ echo "🔧 Iniciando backend Django em $IP:8000..."
 python manage.py runserver $IP:8000 &
 BACKEND_PID=$!
 
+# Worker da fila de itinerários (PLANNING_JOB_BROKER=DatabaseBroker)
+echo "⚙️  Iniciando worker de planejamento..."
+python manage.py run_planning_worker &
+WORKER_PID=$!
+
 # Aguardar backend iniciar
 sleep 5
 
@@ -73,6 +78,7 @@ cleanup() {
     echo ""
     echo "🛑 Parando aplicação..."
     kill $BACKEND_PID 2>/dev/null
+    kill $WORKER_PID 2>/dev/null
     kill $FLUTTER_PID 2>/dev/null
     exit 0
 }